@@ -14,6 +14,8 @@ import numpy as np
 from scipy import signal
 import matplotlib.pyplot as plt
 
+from filters import design_filter
+
 
 class EEGAnalyzer:
     def __init__(self, sample_rate: int):
@@ -76,17 +78,18 @@ class EEGAnalyzer:
         nperseg = int(window_size * self.sample_rate)
         noverlap = int(nperseg * overlap)
 
-        for ch in range(data.shape[1]):
-            # 短时傅里叶变换
-            f, t, Zxx = signal.stft(data[:, ch], fs=self.sample_rate,
-                                    nperseg=nperseg, noverlap=noverlap)
+        # 所有通道一次完成短时傅里叶变换，Zxx形状为(channels, freqs, times)
+        f, t, Zxx = signal.stft(data.T, fs=self.sample_rate,
+                                nperseg=nperseg, noverlap=noverlap)
 
-            # 提取指定频率范围
-            mask = (f >= freq_range[0]) & (f <= freq_range[1])
+        # 提取指定频率范围
+        mask = (f >= freq_range[0]) & (f <= freq_range[1])
+        power = np.abs(Zxx[:, mask, :])
+        for ch in range(data.shape[1]):
             tf_data[f'channel_{ch}'] = {
                 'frequencies': f[mask],
                 'times': t,
-                'power': np.abs(Zxx[mask, :])
+                'power': power[ch]
             }
 
         return tf_data
@@ -103,30 +106,17 @@ class EEGAnalyzer:
         phase_data: 相位数据字典
         """
         phase_data = {}
-        n_channels = data.shape[1]
-
-        # 计算相位锁定值(PLV)矩阵
-        plv_matrix = np.zeros((n_channels, n_channels))
-
-        for i in range(n_channels):
-            for j in range(i + 1, n_channels):
-                # 带通滤波
-                b, a = signal.butter(4, [freq_band[0], freq_band[1]],
-                                     btype='band', fs=self.sample_rate)
-                sig1 = signal.filtfilt(b, a, data[:, i])
-                sig2 = signal.filtfilt(b, a, data[:, j])
-
-                # 希尔伯特变换获取相位
-                phase1 = np.angle(signal.hilbert(sig1))
-                phase2 = np.angle(signal.hilbert(sig2))
-
-                # 计算相位差
-                phase_diff = phase1 - phase2
-
-                # 计算PLV
-                plv = np.abs(np.mean(np.exp(1j * phase_diff)))
-                plv_matrix[i, j] = plv
-                plv_matrix[j, i] = plv
+
+        # 所有通道一次完成带通滤波和希尔伯特变换
+        sos = design_filter('bandpass', 4, tuple(freq_band), self.sample_rate)
+        filtered = signal.sosfiltfilt(sos, data, axis=0)
+        phase = np.angle(signal.hilbert(filtered, axis=0))
+
+        # 计算相位锁定值(PLV)矩阵：PLV(i, j) = |mean(exp(1j * (phase_i - phase_j)))|，
+        # 用单位相量的矩阵乘积一次得到所有通道对
+        phasors = np.exp(1j * phase)
+        plv_matrix = np.abs(phasors.conj().T @ phasors) / phasors.shape[0]
+        plv_matrix = np.clip(plv_matrix, 0, 1)
 
         phase_data['plv_matrix'] = plv_matrix
 
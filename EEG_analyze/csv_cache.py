@@ -0,0 +1,244 @@
+"""
+CSV二进制缓存模块
+
+首次解析CSV文件后，将数据以.npy格式连同一个小的元数据文件写入缓存目录，
+之后的加载直接内存映射缓存文件而不再重新解析文本。缓存按源文件路径、大小、
+修改时间以及加载参数建立索引，超过容量上限时按最近最少使用(LRU)顺序淘汰。
+
+命令行用法:
+    python csv_cache.py info
+    python csv_cache.py prune --max-size 2G
+    python csv_cache.py clear
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'eeg_analyze', 'csv')
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+
+
+def parse_size(size: str) -> int:
+    """
+    Description: 将'500M'、'2G'等容量字符串转换为字节数
+    -------------------------------
+    Parameters:
+    size: 容量字符串，支持K、M、G、T后缀，不带后缀时单位为字节
+
+    Returns:
+    n_bytes: 字节数
+    """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    size = str(size).strip().upper().rstrip('B')
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+class CSVCache:
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """
+        Description: CSV二进制缓存
+        -------------------------------
+        Parameters:
+        cache_dir: 缓存目录，默认读取环境变量EEG_ANALYZE_CACHE_DIR，否则为~/.cache/eeg_analyze/csv
+        max_bytes: 缓存容量上限（字节），默认读取环境变量EEG_ANALYZE_CACHE_SIZE，否则为5GB
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get('EEG_ANALYZE_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = parse_size(os.environ.get('EEG_ANALYZE_CACHE_SIZE', DEFAULT_MAX_BYTES))
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _key(self, data_path: str, params: dict) -> str:
+        """根据源文件路径、大小、修改时间和加载参数生成缓存键"""
+        stat = os.stat(data_path)
+        source = {
+            'path': os.path.abspath(data_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'params': params,
+        }
+        return hashlib.sha1(json.dumps(source, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        return (os.path.join(self.cache_dir, f'{key}.npy'),
+                os.path.join(self.cache_dir, f'{key}.json'))
+
+    def load(self, data_path: str, **params):
+        """
+        Description: 从缓存中加载CSV文件对应的数据
+        -------------------------------
+        Parameters:
+        data_path: 源CSV文件路径
+        params: 影响解析结果的加载参数
+
+        Returns:
+        data: 内存映射的只读数组，未命中时为None
+        columns: 列名列表，未命中时为None
+        """
+        npy_path, meta_path = self._paths(self._key(data_path, params))
+        if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            return None, None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            data = np.load(npy_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None, None
+
+        # 更新元数据文件的修改时间作为最近访问时间，供LRU淘汰使用
+        os.utime(meta_path)
+
+        return data, meta['columns']
+
+    def store(self, data_path: str, data: np.ndarray, columns: list, **params):
+        """
+        Description: 将解析后的CSV数据写入缓存，并在超出容量上限时淘汰旧条目
+        -------------------------------
+        Parameters:
+        data_path: 源CSV文件路径
+        data: 解析得到的数值数组
+        columns: 列名列表
+        params: 影响解析结果的加载参数
+
+        Returns:
+        stored: 是否成功写入缓存
+        """
+        if data.dtype.kind not in 'biuf' or data.nbytes > self.max_bytes:
+            return False
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        npy_path, meta_path = self._paths(self._key(data_path, params))
+        meta = {
+            'source': os.path.abspath(data_path),
+            'params': params,
+            'columns': [str(c) for c in columns],
+            'shape': list(data.shape),
+            'dtype': str(data.dtype),
+            'created': time.time(),
+        }
+
+        # 先写临时文件再原子替换，避免共享存储上的并发读取看到不完整的文件
+        tmp_suffix = f'.{os.getpid()}.tmp'
+        try:
+            with open(npy_path + tmp_suffix, 'wb') as f:
+                np.save(f, data)
+            with open(meta_path + tmp_suffix, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, default=str)
+            os.replace(npy_path + tmp_suffix, npy_path)
+            os.replace(meta_path + tmp_suffix, meta_path)
+        except OSError as e:
+            print(f"写入CSV缓存失败: {str(e)}")
+            for path in (npy_path + tmp_suffix, meta_path + tmp_suffix):
+                if os.path.exists(path):
+                    os.remove(path)
+            return False
+
+        self.prune()
+        return True
+
+    def entries(self):
+        """
+        Description: 列出缓存条目
+        -------------------------------
+        Returns:
+        entries: 列表，每项为(缓存键, 占用字节数, 最近访问时间)，按最近访问时间从旧到新排序
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-len('.json')]
+            npy_path, meta_path = self._paths(key)
+            try:
+                n_bytes = os.path.getsize(meta_path)
+                if os.path.exists(npy_path):
+                    n_bytes += os.path.getsize(npy_path)
+                entries.append((key, n_bytes, os.path.getmtime(meta_path)))
+            except OSError:
+                continue
+
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def size(self) -> int:
+        """返回缓存当前占用的字节数"""
+        return sum(n_bytes for _, n_bytes, _ in self.entries())
+
+    def prune(self, max_bytes: int = None):
+        """
+        Description: 按LRU顺序淘汰缓存条目，直到总占用不超过上限
+        -------------------------------
+        Parameters:
+        max_bytes: 容量上限（字节），默认使用实例的max_bytes
+
+        Returns:
+        removed: 被淘汰的条目数
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+
+        entries = self.entries()
+        total = sum(n_bytes for _, n_bytes, _ in entries)
+        removed = 0
+
+        for key, n_bytes, _ in entries:
+            if total <= max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= n_bytes
+            removed += 1
+
+        return removed
+
+    def clear(self):
+        """清空缓存，返回被删除的条目数"""
+        return self.prune(0)
+
+
+def main():
+    """缓存管理命令行入口"""
+    parser = argparse.ArgumentParser(description='管理EEG CSV二进制缓存')
+    parser.add_argument('--cache-dir', default=None, help='缓存目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('info', help='显示缓存占用')
+    prune_parser = subparsers.add_parser('prune', help='按LRU顺序淘汰缓存条目')
+    prune_parser.add_argument('--max-size', default=None, help='容量上限，如500M、2G')
+    subparsers.add_parser('clear', help='清空缓存')
+    args = parser.parse_args()
+
+    cache = CSVCache(args.cache_dir)
+
+    if args.command == 'info':
+        entries = cache.entries()
+        print(f"缓存目录: {cache.cache_dir}")
+        print(f"条目数: {len(entries)}")
+        print(f"占用: {sum(n_bytes for _, n_bytes, _ in entries) / 1024 ** 2:.2f} MB "
+              f"/ 上限 {cache.max_bytes / 1024 ** 2:.2f} MB")
+    elif args.command == 'prune':
+        max_bytes = parse_size(args.max_size) if args.max_size is not None else None
+        removed = cache.prune(max_bytes)
+        print(f"已淘汰 {removed} 个缓存条目，当前占用 {cache.size() / 1024 ** 2:.2f} MB")
+    elif args.command == 'clear':
+        removed = cache.clear()
+        print(f"已删除 {removed} 个缓存条目")
+
+
+if __name__ == "__main__":
+    main()
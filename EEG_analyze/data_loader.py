@@ -1,100 +1,367 @@
+from fractions import Fraction
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
 import mne
+from numpy.lib.stride_tricks import as_strided
+from scipy import signal
+
+from csv_cache import CSVCache
+from osc_loader import isOSCCSV, readOSCCSV, iterOSCCSV
 
 
-def loadEEGCSV(data_path: str, window: float, frame: float, sample_rate: int, channels: int):
+def segmentEEG(data: np.ndarray, window: float, frame: float, sample_rate: int, copy: bool = False):
     """
-    Description: 加载CSV文件并进行数据分段
+    Description: 对连续信号进行滑动窗口分段
     -------------------------------
     Parameters:
-    data_path: 输入的csv文件路径
+    data: 连续信号，形状为(samples, channels)
     window: 窗的大小（单位：s）
     frame: 帧的大小，即窗移的大小（单位：s）
     sample_rate: 采样率的大小（单位：Hz）
-    channels: 通道数量
+    copy: 为False时返回共享原始内存的只读跨步视图（零拷贝），为True时返回独立的数组副本
 
     Returns:
     X: 形状为(segments, samples, channels)的numpy数组
     """
-    df = pd.read_csv(data_path)
-    print("CSV文件形状:", df.shape)
-    print("CSV文件列名:", df.columns.tolist())
-
-    data = df.values
-
-    if channels != data.shape[1]:
-        print(f"错误：期望{channels}个通道，但数据中有{data.shape[1]}个通道")
-        return None
-
-    # 计算窗口和帧的采样点数
     window_samples = int(window * sample_rate)
     frame_samples = int(frame * sample_rate)
 
-    # 计算总段数
     n_segments = max(0, (data.shape[0] - window_samples) // frame_samples + 1)
 
     if n_segments == 0:
         raise ValueError(f"数据长度不足以分段。需要至少{window_samples}个采样点，但只有{data.shape[0]}个")
 
-    # 创建输出数组
-    X = np.zeros((n_segments, window_samples, channels))
+    # 相邻窗口在时间轴上相差frame_samples个采样点，直接通过步长描述，不复制数据
+    X = as_strided(data,
+                   shape=(n_segments, window_samples, data.shape[1]),
+                   strides=(frame_samples * data.strides[0], data.strides[0], data.strides[1]),
+                   writeable=False)
 
-    # 使用滑动窗口进行分段
-    for i in range(n_segments):
-        start_idx = i * frame_samples
-        end_idx = start_idx + window_samples
-        if end_idx > data.shape[0]:
-            # 如果最后一段数据不足，用0填充
-            X[i, :(data.shape[0] - start_idx), :] = data[start_idx:, :]
-        else:
-            X[i] = data[start_idx:end_idx, :]
+    if copy:
+        X = np.array(X)
 
     return X
 
 
-def loadEEGNPY(data_path: str, window: float, frame: float, sample_rate: int):
+class EEGSegments:
     """
-    Description: 加载NPY文件并进行数据分段
+    Description: 惰性分段访问器，只在索引时读取被访问的窗口
     -------------------------------
     Parameters:
-    data_path: 输入的NPY文件路径
+    data: 连续信号，形状为(samples, channels)，通常为np.memmap
     window: 窗的大小（单位：s）
     frame: 帧的大小，即窗移的大小（单位：s）
     sample_rate: 采样率的大小（单位：Hz）
+    """
+
+    def __init__(self, data: np.ndarray, window: float, frame: float, sample_rate: int):
+        self.data = data
+        self.sample_rate = sample_rate
+        self._view = segmentEEG(data, window, frame, sample_rate)
+
+    @property
+    def shape(self):
+        return self._view.shape
+
+    @property
+    def ndim(self):
+        return self._view.ndim
+
+    @property
+    def dtype(self):
+        return self._view.dtype
+
+    def __len__(self):
+        return self._view.shape[0]
+
+    def __getitem__(self, key):
+        # 视图上的索引只涉及被选中窗口对应的页，np.array将其读入内存
+        return np.array(self._view[key])
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self._view, dtype=dtype)
+
+    def batches(self, batch_size: int):
+        """
+        Description: 按批次依次读取分段
+        -------------------------------
+        Parameters:
+        batch_size: 每批的分段数
+
+        Returns:
+        生成器，每次产生形状为(batch, samples, channels)的numpy数组
+        """
+        for start in range(0, len(self), batch_size):
+            yield self[start:start + batch_size]
+
+
+def _resolveCSVColumns(data_path: str, usecols: list = None):
+    """将按名称或索引指定的CSV列统一转换为列名列表，只读取表头"""
+    if usecols is None:
+        return None
+
+    header = pd.read_csv(data_path, nrows=0).columns.tolist()
+    columns = []
+    for col in usecols:
+        if isinstance(col, (int, np.integer)):
+            if not -len(header) <= col < len(header):
+                raise ValueError(f"列索引{col}超出范围，CSV文件共有{len(header)}列")
+            columns.append(header[col])
+        elif col in header:
+            columns.append(col)
+        else:
+            raise ValueError(f"CSV文件中不存在列：{col}")
+    return columns
+
+
+def _pickEDFChannels(raw, channels: list = None):
+    """在读取数据之前按名称或索引选择EDF通道，通道顺序与channels一致"""
+    if channels is None:
+        return raw
+
+    names = [raw.ch_names[ch] if isinstance(ch, (int, np.integer)) else ch for ch in channels]
+    missing = [name for name in names if name not in raw.ch_names]
+    if missing:
+        raise ValueError(f"EDF文件中没有通道: {missing}")
+    # mne 1.5之前pick_channels默认按文件中的顺序返回，reorder_channels在各版本中都按给定顺序选择
+    return raw.reorder_channels(names)
+
+
+@lru_cache(maxsize=None)
+def _polyphaseFilter(up: int, down: int):
+    """设计与resample_poly默认参数相同的抗混叠FIR滤波器，按(up, down)缓存"""
+    max_rate = max(up, down)
+    return signal.firwin(2 * 10 * max_rate + 1, 1. / max_rate, window=('kaiser', 5.0))
+
+
+def _iterEDFBlocks(raw, sample_rate: int, start: int = 0, stop: int = None, block_samples: int = None):
+    """
+    Description: 不预加载EDF文件，逐块读取[start, stop)范围内的采样点，必要时逐块进行多相重采样
+    -------------------------------
+    Parameters:
+    raw: 以preload=False打开的mne Raw对象
+    sample_rate: 目标采样率（单位：Hz）
+    start: 起始采样点（文件采样率下）
+    stop: 结束采样点（文件采样率下，不包含），为None时读到文件末尾
+    block_samples: 每块读取的采样点数（文件采样率下），默认为60秒
 
     Returns:
-    X: 形状为(segments, samples, channels)的numpy数组
+    生成器，每次产生形状为(samples, channels)的数组，拼接后与对整个文件做resample_poly后截取的结果一致
     """
-    data = np.load(data_path)
+    sfreq = raw.info['sfreq']
+    n_times = raw.n_times
+    stop = n_times if stop is None else min(stop, n_times)
+    if block_samples is None:
+        block_samples = int(60 * sfreq)
+
+    ratio = Fraction(sample_rate).limit_denominator(1000) / Fraction(sfreq).limit_denominator(1000)
+    up, down = ratio.numerator, ratio.denominator
+
+    if up == down == 1:
+        for block_start in range(start, stop, block_samples):
+            yield raw.get_data(start=block_start, stop=min(block_start + block_samples, stop)).T
+        return
+
+    h = _polyphaseFilter(up, down)
+    # 每块两侧额外读取的上下文长度，覆盖滤波器的支撑范围，并对齐到down的整数倍
+    pad = -(-((len(h) - 1) // 2) // up) + 1
+    pad = -(-pad // down) * down
+    block_samples = max(down, block_samples // down * down)
+
+    # 输出采样点n对应输入时刻n * down / up
+    out_start = -(-start * up // down)
+    out_stop = -(-stop * up // down)
+
+    # 块的起点对齐到down的整数倍，使每块的输出与全局输出网格对齐
+    block_start = start // down * down
+    while block_start < stop:
+        block_stop = min(block_start + block_samples, stop)
+        lo = max(block_start - pad, 0)
+        hi = min(block_stop + pad, n_times)
+
+        x = raw.get_data(start=lo, stop=hi).T
+        y = signal.resample_poly(x, up, down, axis=0, window=h)
+
+        # 只保留本块核心范围内、且位于请求范围内的输出
+        first = max(block_start * up // down, out_start)
+        last = min(-(-block_stop * up // down), out_stop)
+        offset = lo * up // down
+        yield y[first - offset:last - offset]
+
+        block_start = block_stop
+
+
+def _readOSC(data_path: str, osc_address: str = 'eeg', usecols: list = None, dtype=None):
+    """读取OSC记录文件中指定地址的信号，返回形状为(messages, values)的数组和列名列表"""
+    signals = readOSCCSV(data_path, [osc_address])
+    if len(signals) != 1:
+        raise ValueError(f"OSC记录文件中匹配地址{osc_address}的信号有{len(signals)}个：{list(signals)}")
+
+    address, osc_signal = next(iter(signals.items()))
+    data = osc_signal['data']
+    columns = [f'{address}_{i + 1}' for i in range(data.shape[1])]
+
+    if usecols is not None:
+        indices = [columns.index(col) if isinstance(col, str) else col for col in usecols]
+        data = data[:, indices]
+        columns = [columns[i] for i in indices]
+
+    if dtype is not None:
+        data = data.astype(dtype, copy=False)
+
+    return data, columns
+
+
+def _readCSV(data_path: str, cache=True, usecols: list = None, dtype=None, osc_address: str = 'eeg'):
+    """读取CSV文件中的连续信号，返回形状为(samples, channels)的数组和列名列表"""
+    if cache is True:
+        cache = CSVCache()
+
+    osc = isOSCCSV(data_path)
+    params = {}
+    if osc:
+        params['osc_address'] = osc_address
+    else:
+        usecols = _resolveCSVColumns(data_path, usecols)
+    if usecols is not None:
+        params['usecols'] = usecols
+    if dtype is not None:
+        params['dtype'] = np.dtype(dtype).name
+
+    data = None
+    if cache:
+        data, columns = cache.load(data_path, **params)
+
+    if data is not None:
+        print("从缓存加载CSV数据，形状:", data.shape)
+        print("CSV文件列名:", columns)
+        return data, columns
+
+    if osc:
+        data, columns = _readOSC(data_path, osc_address, usecols, dtype)
+        print("OSC记录形状:", data.shape)
+        print("OSC信号列名:", columns)
+    else:
+        df = pd.read_csv(data_path, usecols=usecols, dtype=dtype)
+        if usecols is not None:
+            # pandas按文件中的顺序返回列，这里恢复为请求的顺序
+            df = df[usecols]
+        print("CSV文件形状:", df.shape)
+        print("CSV文件列名:", df.columns.tolist())
+
+        data = df.values
+        columns = df.columns.tolist()
+
+    if cache:
+        cache.store(data_path, data, columns, **params)
+
+    return data, columns
+
+
+def _readNPY(data_path: str, mmap_mode: str = None):
+    """读取NPY文件中的连续信号，返回形状为(samples, channels)的数组"""
+    data = np.load(data_path, mmap_mode=mmap_mode)
     print("原始数据形状:", data.shape)
 
     if len(data.shape) != 2:
         raise ValueError("NPY文件数据必须是2维数组")
 
     if data.shape[0] < data.shape[1]:
+        # 转置只交换步长，对内存映射数组同样不会复制数据
         data = data.T
         print("数据已转置，新形状:", data.shape)
 
-    FEATURE_NUM = int(window * sample_rate)
-    FRAME_NUM = int(frame * sample_rate)
+    return data
 
-    n_segments = max(0, (data.shape[0] - FEATURE_NUM) // FRAME_NUM + 1)
 
-    if n_segments == 0:
-        raise ValueError(f"数据长度不足以分段。需要至少{FEATURE_NUM}个采样点，但只有{data.shape[0]}个")
+def _readEDF(data_path: str, sample_rate: int, channels: list = None, dtype=None,
+             tmin: float = None, tmax: float = None):
+    """读取EDF文件中的连续信号，返回形状为(samples, channels)的数组和通道名称列表"""
+    raw = mne.io.read_raw_edf(data_path, preload=False)
+    print("EDF文件信息:")
+    print(f"采样率: {raw.info['sfreq']} Hz")
+    print(f"通道数: {len(raw.ch_names)}")
+    print(f"通道名称: {raw.ch_names}")
+    print(f"数据时长: {raw.n_times / raw.info['sfreq']:.2f} 秒")
 
-    X = np.zeros((n_segments, FEATURE_NUM, data.shape[1]))
+    # 先选择通道再读取数据，未选中的通道不会被加载
+    _pickEDFChannels(raw, channels)
+    ch_names = raw.ch_names
 
-    for i in range(n_segments):
-        start_idx = i * FRAME_NUM
-        end_idx = start_idx + FEATURE_NUM
-        X[i] = data[start_idx:end_idx]
+    sfreq = raw.info['sfreq']
+    start = 0 if tmin is None else int(round(tmin * sfreq))
+    stop = raw.n_times if tmax is None else int(round(tmax * sfreq))
+    if start >= min(stop, raw.n_times):
+        raise ValueError(f"请求的时间范围内没有数据：tmin={tmin}, tmax={tmax}")
 
-    return X
+    if sfreq != sample_rate:
+        print(f"多相重采样从 {sfreq} Hz 到 {sample_rate} Hz")
+
+    # 只读取请求的时间范围，重采样逐块进行
+    data = np.concatenate([block if dtype is None else block.astype(dtype, copy=False)
+                           for block in _iterEDFBlocks(raw, sample_rate, start, stop)])
+
+    return data, ch_names
 
 
-def loadEEGEDF(data_path: str, window: float, frame: float, sample_rate: int, channels: list = None):
+def loadEEGCSV(data_path: str, window: float, frame: float, sample_rate: int, channels: int = None,
+               copy: bool = False, cache=True, usecols: list = None, dtype=None, osc_address: str = 'eeg'):
+    """
+    Description: 加载CSV文件并进行数据分段
+    -------------------------------
+    Parameters:
+    data_path: 输入的csv文件路径
+    window: 窗的大小（单位：s）
+    frame: 帧的大小，即窗移的大小（单位：s）
+    sample_rate: 采样率的大小（单位：Hz）
+    channels: 通道数量，为None时不校验
+    copy: 是否返回独立的分段副本，默认返回只读的零拷贝视图
+    cache: 二进制缓存，True使用默认的CSVCache，也可传入CSVCache实例，False或None时不使用缓存
+    usecols: 需要加载的列（列名或列索引），为None时加载所有列；只有被选中的列会被解析
+    dtype: 数据类型，如np.float32，为None时由pandas推断
+    osc_address: 文件为OSCDataReceiver记录时读取的地址，可写完整地址'/8001/eeg'或信号名'eeg'；
+                 此时usecols为参数的位置索引
+
+    Returns:
+    X: 形状为(segments, samples, channels)的numpy数组
+    """
+    data, _ = _readCSV(data_path, cache, usecols, dtype, osc_address)
+
+    if channels is not None and channels != data.shape[1]:
+        print(f"错误：期望{channels}个通道，但数据中有{data.shape[1]}个通道")
+        return None
+
+    return segmentEEG(data, window, frame, sample_rate, copy)
+
+
+def loadEEGNPY(data_path: str, window: float, frame: float, sample_rate: int, copy: bool = False,
+               mmap_mode: str = None):
+    """
+    Description: 加载NPY文件并进行数据分段
+    -------------------------------
+    Parameters:
+    data_path: 输入的NPY文件路径
+    window: 窗的大小（单位：s）
+    frame: 帧的大小，即窗移的大小（单位：s）
+    sample_rate: 采样率的大小（单位：Hz）
+    copy: 是否返回独立的分段副本，默认返回只读的零拷贝视图
+    mmap_mode: 内存映射模式（如'r'），指定时不将文件读入内存，并返回惰性分段访问器
+
+    Returns:
+    X: 形状为(segments, samples, channels)的numpy数组；指定mmap_mode时为EEGSegments
+    """
+    data = _readNPY(data_path, mmap_mode)
+
+    if mmap_mode is not None:
+        return EEGSegments(data, window, frame, sample_rate)
+
+    return segmentEEG(data, window, frame, sample_rate, copy)
+
+
+def loadEEGEDF(data_path: str, window: float, frame: float, sample_rate: int, channels: list = None,
+               copy: bool = False, dtype=None, tmin: float = None, tmax: float = None):
     """
     Description: 加载EDF文件并进行数据分段
     -------------------------------
@@ -103,56 +370,219 @@ def loadEEGEDF(data_path: str, window: float, frame: float, sample_rate: int, ch
     window: 窗的大小（单位：s）
     frame: 帧的大小，即窗移的大小（单位：s）
     sample_rate: 采样率的大小（单位：Hz）
-    channels: 需要加载的通道名称列表，如果为None则加载所有通道
+    channels: 需要加载的通道（名称或索引）列表，如果为None则加载所有通道；未选中的通道不会被读入内存
+    copy: 是否返回独立的分段副本，默认返回只读的零拷贝视图
+    dtype: 数据类型，如np.float32，为None时为float64
+    tmin: 读取的起始时间（单位：s），为None时从文件开头读取
+    tmax: 读取的结束时间（单位：s），为None时读到文件末尾
 
     Returns:
     X: 形状为(segments, samples, channels)的numpy数组
     ch_names: 通道名称列表
     """
     try:
-        raw = mne.io.read_raw_edf(data_path, preload=True)
-        print("EDF文件信息:")
-        print(f"采样率: {raw.info['sfreq']} Hz")
-        print(f"通道数: {len(raw.ch_names)}")
-        print(f"通道名称: {raw.ch_names}")
-        print(f"数据时长: {raw.n_times / raw.info['sfreq']:.2f} 秒")
+        data, ch_names = _readEDF(data_path, sample_rate, channels, dtype, tmin, tmax)
 
-        if channels is not None:
-            raw.pick_channels(channels)
+        X = segmentEEG(data, window, frame, sample_rate, copy)
+
+        return X, ch_names
+
+    except Exception as e:
+        print(f"加载EDF文件时出错: {str(e)}")
+        raise
 
-        if raw.info['sfreq'] != sample_rate:
-            print(f"重采样从 {raw.info['sfreq']} Hz 到 {sample_rate} Hz")
-            raw.resample(sample_rate)
 
-        data = raw.get_data()
-        ch_names = raw.ch_names
+def _iterCSVChunks(data_path: str, chunk_samples: int, channels: int = None, usecols: list = None,
+                   dtype=None):
+    """按块读取CSV文件，每次产生形状为(samples, channels)的数组"""
+    usecols = _resolveCSVColumns(data_path, usecols)
+    for chunk in pd.read_csv(data_path, chunksize=chunk_samples, usecols=usecols, dtype=dtype):
+        if usecols is not None:
+            chunk = chunk[usecols]
+        if channels is not None and chunk.shape[1] != channels:
+            raise ValueError(f"期望{channels}个通道，但数据中有{chunk.shape[1]}个通道")
+        yield chunk.values
+
+
+def _iterOSCChunks(data_path: str, chunk_samples: int, channels: int = None, usecols: list = None,
+                   dtype=None, osc_address: str = 'eeg'):
+    """按块读取OSC记录文件中指定地址的信号，每次产生形状为(samples, channels)的数组，列的选择与_readOSC一致"""
+    matched = None
+    for address, _, data in iterOSCCSV(data_path, [osc_address], chunk_samples):
+        if matched is None:
+            matched = address
+        elif address != matched:
+            raise ValueError(f"OSC记录文件中匹配地址{osc_address}的信号不止一个：{[matched, address]}")
+
+        if usecols is not None:
+            columns = [f'{address}_{i + 1}' for i in range(data.shape[1])]
+            data = data[:, [columns.index(col) if isinstance(col, str) else col for col in usecols]]
+        if channels is not None and data.shape[1] != channels:
+            raise ValueError(f"期望{channels}个通道，但数据中有{data.shape[1]}个通道")
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        yield data
+
+    if matched is None:
+        raise ValueError(f"OSC记录文件中没有匹配地址{osc_address}的信号")
+
+
+def _iterNPYChunks(data_path: str, chunk_samples: int):
+    """通过内存映射按块读取NPY文件，每次产生形状为(samples, channels)的数组"""
+    data = np.load(data_path, mmap_mode='r')
 
+    if len(data.shape) != 2:
+        raise ValueError("NPY文件数据必须是2维数组")
+
+    if data.shape[0] < data.shape[1]:
         data = data.T
 
-        FEATURE_NUM = int(window * sample_rate)
-        FRAME_NUM = int(frame * sample_rate)
+    for start in range(0, data.shape[0], chunk_samples):
+        yield np.array(data[start:start + chunk_samples])
 
-        n_segments = max(0, (data.shape[0] - FEATURE_NUM) // FRAME_NUM + 1)
 
-        if n_segments == 0:
-            raise ValueError(f"数据长度不足以分段。需要至少{FEATURE_NUM}个采样点，但只有{data.shape[0]}个")
+def _iterEDFChunks(data_path: str, chunk_samples: int, sample_rate: int, channels: list = None,
+                   dtype=None, tmin: float = None, tmax: float = None):
+    """不预加载EDF文件，按块读取并在需要时逐块重采样，每次产生形状为(samples, channels)的数组"""
+    raw = mne.io.read_raw_edf(data_path, preload=False)
+    _pickEDFChannels(raw, channels)
 
-        X = np.zeros((n_segments, FEATURE_NUM, data.shape[1]))
+    sfreq = raw.info['sfreq']
+    start = 0 if tmin is None else int(round(tmin * sfreq))
+    stop = raw.n_times if tmax is None else int(round(tmax * sfreq))
+    block_samples = max(1, int(chunk_samples * sfreq / sample_rate))
 
-        for i in range(n_segments):
-            start_idx = i * FRAME_NUM
-            end_idx = start_idx + FEATURE_NUM
-            X[i] = data[start_idx:end_idx]
+    for chunk in _iterEDFBlocks(raw, sample_rate, start, stop, block_samples):
+        yield chunk if dtype is None else chunk.astype(dtype, copy=False)
 
-        return X, ch_names
 
-    except Exception as e:
-        print(f"加载EDF文件时出错: {str(e)}")
-        raise
+def streamSegments(chunks, window: float, frame: float, sample_rate: int, batch_size: int = 64):
+    """
+    Description: 将按块到达的连续信号分段，跨块边界保留窗口重叠部分
+    -------------------------------
+    Parameters:
+    chunks: 可迭代对象，依次产生形状为(samples, channels)的连续信号块
+    window: 窗的大小（单位：s）
+    frame: 帧的大小，即窗移的大小（单位：s）
+    sample_rate: 采样率的大小（单位：Hz）
+    batch_size: 每批的分段数
+
+    Returns:
+    生成器，每次产生形状为(batch, samples, channels)的只读分段视图，最后一批可能不足batch_size
+    """
+    window_samples = int(window * sample_rate)
+    frame_samples = int(frame * sample_rate)
+
+    # 一批完整分段覆盖的采样点数
+    span = (batch_size - 1) * frame_samples + window_samples
+    advance = batch_size * frame_samples
+    buffer = None
+    n_yielded = 0
+    # 窗移大于窗长时，下一批的起点可能位于尚未到达的块中，记录仍需跳过的采样点数
+    pending_skip = 0
+
+    for chunk in chunks:
+        if pending_skip:
+            skipped = min(pending_skip, chunk.shape[0])
+            chunk = chunk[skipped:]
+            pending_skip -= skipped
+        buffer = chunk if buffer is None else np.concatenate([buffer, chunk])
+
+        while buffer.shape[0] >= span:
+            yield segmentEEG(buffer[:span], window, frame, sample_rate)
+            n_yielded += batch_size
+            # 下一批从第batch_size个窗口的起点开始，重叠部分留在缓冲区中
+            pending_skip = max(0, advance - buffer.shape[0])
+            buffer = buffer[advance:]
+
+    if buffer is not None and buffer.shape[0] >= window_samples:
+        yield segmentEEG(buffer, window, frame, sample_rate)
+    elif n_yielded == 0:
+        n_samples = 0 if buffer is None else buffer.shape[0]
+        raise ValueError(f"数据长度不足以分段。需要至少{window_samples}个采样点，但只有{n_samples}个")
+
+
+def streamEEGData(data_path: str, window: float, frame: float, sample_rate: int, channels: int = None,
+                  edf_channels: list = None, batch_size: int = 64, usecols: list = None, dtype=None,
+                  tmin: float = None, tmax: float = None, osc_address: str = 'eeg'):
+    """
+    Description: 流式数据加载接口，按有限大小的块读取文件并逐批产生分段
+    -------------------------------
+    Parameters:
+    data_path: 输入文件路径
+    window: 窗的大小（单位：s）
+    frame: 帧的大小，即窗移的大小（单位：s）
+    sample_rate: 采样率的大小（单位：Hz）
+    channels: 通道数量（CSV格式未指定usecols时需要）
+    edf_channels: 需要加载的EDF通道（名称或索引）列表（仅EDF格式可用）
+    batch_size: 每批的分段数，内存占用由其决定而与文件长度无关
+    usecols: 需要加载的CSV列（列名或列索引）（仅CSV格式可用）
+    dtype: CSV和EDF数据的类型，如np.float32
+    tmin: 读取的起始时间（单位：s）（仅EDF格式可用）
+    tmax: 读取的结束时间（单位：s）（仅EDF格式可用）
+    osc_address: OSCDataReceiver写出的CSV记录中读取的地址，参见loadEEGCSV
+
+    Returns:
+    生成器，每次产生形状为(batch, samples, channels)的numpy数组
+    """
+    file_ext = data_path.split('.')[-1].lower()
+    chunk_samples = batch_size * int(frame * sample_rate)
+
+    if file_ext == 'csv' and isOSCCSV(data_path):
+        chunks = _iterOSCChunks(data_path, chunk_samples, channels, usecols, dtype, osc_address)
+    elif file_ext == 'csv':
+        if channels is None and usecols is None:
+            raise ValueError("CSV格式需要指定channels或usecols参数")
+        chunks = _iterCSVChunks(data_path, chunk_samples, channels, usecols, dtype)
+    elif file_ext == 'npy':
+        chunks = _iterNPYChunks(data_path, chunk_samples)
+    elif file_ext == 'edf':
+        chunks = _iterEDFChunks(data_path, chunk_samples, sample_rate, edf_channels, dtype, tmin, tmax)
+    else:
+        raise ValueError(f"不支持的文件格式：{file_ext}")
+
+    return streamSegments(chunks, window, frame, sample_rate, batch_size)
+
+
+def loadEEGSignal(data_path: str, sample_rate: int, edf_channels: list = None, mmap_mode: str = None,
+                  cache=True, usecols: list = None, dtype=None, tmin: float = None, tmax: float = None,
+                  osc_address: str = 'eeg'):
+    """
+    Description: 加载未分段的连续信号，支持CSV、NPY和EDF格式
+    -------------------------------
+    Parameters:
+    data_path: 输入文件路径
+    sample_rate: 采样率的大小（单位：Hz），EDF文件会被重采样到该采样率
+    edf_channels: 需要加载的EDF通道（名称或索引）列表（仅EDF格式可用）
+    mmap_mode: NPY文件的内存映射模式（仅NPY格式可用）
+    cache: CSV二进制缓存，参见loadEEGCSV（仅CSV格式可用）
+    usecols: 需要加载的CSV列（列名或列索引）（仅CSV格式可用）
+    dtype: CSV和EDF数据的类型，如np.float32
+    tmin: 读取的起始时间（单位：s）（仅EDF格式可用）
+    tmax: 读取的结束时间（单位：s）（仅EDF格式可用）
+    osc_address: OSC记录文件中读取的地址（仅OSCDataReceiver写出的CSV可用）
+
+    Returns:
+    data: 形状为(samples, channels)的numpy数组
+    ch_names: 通道名称列表，NPY格式为Channel_1、Channel_2……
+    """
+    file_ext = data_path.split('.')[-1].lower()
+
+    if file_ext == 'csv':
+        return _readCSV(data_path, cache, usecols, dtype, osc_address)
+    elif file_ext == 'npy':
+        data = _readNPY(data_path, mmap_mode)
+        return data, [f'Channel_{i + 1}' for i in range(data.shape[1])]
+    elif file_ext == 'edf':
+        return _readEDF(data_path, sample_rate, edf_channels, dtype, tmin, tmax)
+    else:
+        raise ValueError(f"不支持的文件格式：{file_ext}")
 
 
 def loadEEGData(data_path: str, window: float, frame: float, sample_rate: int, channels: int = None,
-                edf_channels: list = None):
+                edf_channels: list = None, copy: bool = False, mmap_mode: str = None,
+                stream: bool = False, batch_size: int = 64, cache=True, usecols: list = None,
+                dtype=None, tmin: float = None, tmax: float = None, osc_address: str = 'eeg'):
     """
     Description: 统一的数据加载接口，支持CSV、NPY和EDF格式
     -------------------------------
@@ -161,22 +591,37 @@ def loadEEGData(data_path: str, window: float, frame: float, sample_rate: int, c
     window: 窗的大小（单位：s）
     frame: 帧的大小，即窗移的大小（单位：s）
     sample_rate: 采样率的大小（单位：Hz）
-    channels: 通道数量（仅CSV格式需要）
-    edf_channels: 需要加载的EDF通道名称列表（仅EDF格式可用）
+    channels: 通道数量（CSV格式未指定usecols时需要）
+    edf_channels: 需要加载的EDF通道（名称或索引）列表（仅EDF格式可用）
+    copy: 为False时各格式均返回共享连续信号内存的只读分段视图，为True时返回可写的独立副本
+    mmap_mode: NPY文件的内存映射模式，指定时返回惰性分段访问器EEGSegments（仅NPY格式可用）
+    stream: 为True时返回逐批产生分段的生成器，参见streamEEGData
+    batch_size: 流式读取时每批的分段数
+    cache: CSV二进制缓存，参见loadEEGCSV（仅CSV格式可用）
+    usecols: 需要加载的CSV列（列名或列索引），未选中的列不会被解析（仅CSV格式可用）
+    dtype: CSV和EDF数据的类型，如np.float32
+    tmin: 读取的起始时间（单位：s），只读取该时间之后的数据（仅EDF格式可用）
+    tmax: 读取的结束时间（单位：s）（仅EDF格式可用）
+    osc_address: OSCDataReceiver写出的CSV记录中读取的地址，参见loadEEGCSV
 
     Returns:
     X: 形状为(segments, samples, channels)的numpy数组
     ch_names: 通道名称列表（仅EDF格式返回）
     """
+    if stream:
+        return streamEEGData(data_path, window, frame, sample_rate, channels, edf_channels, batch_size,
+                             usecols, dtype, tmin, tmax, osc_address)
+
     file_ext = data_path.split('.')[-1].lower()
 
     if file_ext == 'csv':
-        if channels is None:
-            raise ValueError("CSV格式需要指定channels参数")
-        return loadEEGCSV(data_path, window, frame, sample_rate, channels)
+        if channels is None and usecols is None:
+            raise ValueError("CSV格式需要指定channels或usecols参数")
+        return loadEEGCSV(data_path, window, frame, sample_rate, channels, copy, cache, usecols, dtype,
+                          osc_address)
     elif file_ext == 'npy':
-        return loadEEGNPY(data_path, window, frame, sample_rate)
+        return loadEEGNPY(data_path, window, frame, sample_rate, copy, mmap_mode)
     elif file_ext == 'edf':
-        return loadEEGEDF(data_path, window, frame, sample_rate, edf_channels)
+        return loadEEGEDF(data_path, window, frame, sample_rate, edf_channels, copy, dtype, tmin, tmax)
     else:
         raise ValueError(f"不支持的文件格式：{file_ext}")
\ No newline at end of file
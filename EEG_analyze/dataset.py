@@ -0,0 +1,209 @@
+"""
+EEG数据集目录模块
+
+将多个记录一次性建立索引：每个记录的连续信号以.npy格式保存，连同采样点数、采样率、
+通道和分段偏移写入持久化的索引文件。之后通过内存映射按全局分段编号随机访问或批量读取分段，
+无需重新加载和分段原始文件。
+
+主要类:
+- EEGDataset: 多记录数据集
+"""
+
+import os
+import json
+import numpy as np
+
+from data_loader import loadEEGSignal, segmentEEG
+
+
+class EEGDataset:
+    INDEX_FILE = 'index.json'
+    SEGMENT_TABLE_FILE = 'segments.npy'
+    RECORDING_DIR = 'recordings'
+
+    def __init__(self, root: str):
+        """
+        Description: 打开已建立索引的EEG数据集
+        -------------------------------
+        Parameters:
+        root: 数据集目录，由EEGDataset.build生成
+        """
+        self.root = root
+
+        with open(os.path.join(root, self.INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        self.window = index['window']
+        self.frame = index['frame']
+        self.sample_rate = index['sample_rate']
+        self.recordings = index['recordings']
+
+        # 每行为(记录编号, 起始采样点)，全局分段编号直接作为行号，O(1)定位
+        self.segment_table = np.load(os.path.join(root, self.SEGMENT_TABLE_FILE), mmap_mode='r')
+        self._views = {}
+
+    @classmethod
+    def build(cls, sources, root: str, window: float, frame: float, sample_rate: int, **load_kwargs):
+        """
+        Description: 为多个记录建立数据集索引
+        -------------------------------
+        Parameters:
+        sources: 数据目录，或文件路径列表
+        root: 数据集保存目录
+        window: 窗的大小（单位：s）
+        frame: 帧的大小，即窗移的大小（单位：s）
+        sample_rate: 采样率的大小（单位：Hz），EDF文件会被重采样到该采样率
+        load_kwargs: 传递给loadEEGSignal的其他加载参数，如usecols、dtype、edf_channels
+
+        Returns:
+        dataset: EEGDataset实例
+        """
+        if isinstance(sources, str):
+            sources = sorted(os.path.join(sources, name) for name in os.listdir(sources)
+                             if name.endswith(('.csv', '.npy', '.edf')))
+
+        window_samples = int(window * sample_rate)
+        frame_samples = int(frame * sample_rate)
+
+        os.makedirs(os.path.join(root, cls.RECORDING_DIR), exist_ok=True)
+        recordings = []
+        tables = []
+        segment_offset = 0
+
+        for data_path in sources:
+            print(f"正在索引记录: {data_path}")
+            data, ch_names = loadEEGSignal(data_path, sample_rate, **load_kwargs)
+
+            n_segments = max(0, (data.shape[0] - window_samples) // frame_samples + 1)
+            if n_segments == 0:
+                print(f"警告：{data_path} 长度不足一个窗口，已跳过")
+                continue
+
+            recording_id = len(recordings)
+            file_name = os.path.join(cls.RECORDING_DIR, f'{recording_id:05d}.npy')
+            np.save(os.path.join(root, file_name), np.ascontiguousarray(data))
+
+            recordings.append({
+                'source': os.path.abspath(data_path),
+                'file': file_name,
+                'n_samples': int(data.shape[0]),
+                'sample_rate': sample_rate,
+                'channels': [str(name) for name in ch_names],
+                'n_segments': int(n_segments),
+                'segment_offset': int(segment_offset),
+            })
+
+            table = np.empty((n_segments, 2), dtype=np.int64)
+            table[:, 0] = recording_id
+            table[:, 1] = np.arange(n_segments) * frame_samples
+            tables.append(table)
+            segment_offset += n_segments
+
+        segment_table = np.concatenate(tables) if tables else np.empty((0, 2), dtype=np.int64)
+        np.save(os.path.join(root, cls.SEGMENT_TABLE_FILE), segment_table)
+
+        index = {
+            'window': window,
+            'frame': frame,
+            'sample_rate': sample_rate,
+            'recordings': recordings,
+        }
+        with open(os.path.join(root, cls.INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+
+        print(f"数据集索引完成: {len(recordings)} 个记录，{segment_offset} 个分段")
+        return cls(root)
+
+    def __len__(self):
+        return self.segment_table.shape[0]
+
+    def _view(self, recording: int):
+        """返回指定记录的只读分段视图，底层为内存映射"""
+        if recording not in self._views:
+            path = os.path.join(self.root, self.recordings[recording]['file'])
+            signal = np.load(path, mmap_mode='r')
+            self._views[recording] = segmentEEG(signal, self.window, self.frame, self.sample_rate)
+        return self._views[recording]
+
+    def segment(self, recording: int, k: int):
+        """
+        Description: 读取指定记录的第k个分段
+        -------------------------------
+        Parameters:
+        recording: 记录编号
+        k: 记录内的分段编号
+
+        Returns:
+        segment: 形状为(samples, channels)的numpy数组
+        """
+        return np.array(self._view(recording)[k])
+
+    def locate(self, index: int):
+        """
+        Description: 将全局分段编号转换为(记录编号, 记录内分段编号)
+        -------------------------------
+        Parameters:
+        index: 全局分段编号
+
+        Returns:
+        recording: 记录编号
+        k: 记录内的分段编号
+        """
+        recording = int(self.segment_table[index, 0])
+        return recording, index - self.recordings[recording]['segment_offset']
+
+    def get_batch(self, indices):
+        """
+        Description: 按全局分段编号批量读取分段
+        -------------------------------
+        Parameters:
+        indices: 全局分段编号数组
+
+        Returns:
+        batch: 形状为(batch, samples, channels)的numpy数组，顺序与indices一致
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        indices = np.where(indices < 0, indices + len(self), indices)
+        recordings = self.segment_table[indices, 0]
+
+        batch = None
+        # 按记录分组，每组通过一次花式索引只读取被选中的窗口
+        for recording in np.unique(recordings):
+            recording = int(recording)
+            positions = np.nonzero(recordings == recording)[0]
+            local = indices[positions] - self.recordings[recording]['segment_offset']
+            segments = self._view(recording)[local]
+
+            if batch is None:
+                batch = np.empty((len(indices),) + segments.shape[1:], dtype=segments.dtype)
+            elif segments.shape[1:] != batch.shape[1:]:
+                raise ValueError("批量读取的分段来自通道数不同的记录")
+            batch[positions] = segments
+
+        return batch
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.segment(*self.locate(index if index >= 0 else index + len(self)))
+        if isinstance(index, slice):
+            index = np.arange(len(self))[index]
+        return self.get_batch(index)
+
+    def batches(self, batch_size: int, shuffle: bool = False, seed: int = None):
+        """
+        Description: 按批次遍历整个数据集
+        -------------------------------
+        Parameters:
+        batch_size: 每批的分段数
+        shuffle: 是否打乱跨记录的分段顺序
+        seed: 打乱顺序使用的随机种子
+
+        Returns:
+        生成器，每次产生形状为(batch, samples, channels)的numpy数组
+        """
+        order = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+
+        for start in range(0, len(order), batch_size):
+            yield self.get_batch(order[start:start + batch_size])
@@ -1,9 +1,83 @@
+from collections.abc import Mapping
+from functools import lru_cache
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy import signal
-from scipy import stats
 
 
-def spectral_analysis(data: np.ndarray, sample_rate: int, window: str = 'hann'):
+SPECTRAL_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+@lru_cache(maxsize=16)
+def _welch_window(window, nperseg: int, sample_rate: float):
+    """按(窗函数, 窗长, 采样率)缓存Welch法使用的窗、密度缩放系数和频率数组"""
+    win = signal.get_window(window, nperseg)
+    scale = 1.0 / (sample_rate * np.sum(win ** 2))
+    freqs = np.fft.rfftfreq(nperseg, 1 / sample_rate)
+    win.flags.writeable = False
+    freqs.flags.writeable = False
+    return win, scale, freqs
+
+
+def _frame_power(frames: np.ndarray, win: np.ndarray) -> np.ndarray:
+    """各帧（最后一维为时间）去均值、加窗后的功率谱"""
+    frames = frames - frames.mean(axis=-1, keepdims=True)
+    spectrum = np.fft.rfft(frames * win, axis=-1)
+    return spectrum.real ** 2 + spectrum.imag ** 2
+
+
+def _one_sided_density(psd: np.ndarray, scale: float, nperseg: int) -> np.ndarray:
+    """原地换算为单边功率谱密度：除直流和奈奎斯特频率外功率加倍"""
+    psd *= scale
+    psd[..., 1:psd.shape[-1] - (nperseg % 2 == 0)] *= 2
+    return psd
+
+
+def welch_psd(data: np.ndarray, sample_rate: int, window: str = 'hann', nperseg: int = None):
+    """
+    Description: 批量Welch功率谱估计，所有分段和通道沿时间轴一次完成，结果与逐通道调用signal.welch一致
+                 （50%重叠、每帧去均值、单边功率谱密度）
+    -------------------------------
+    Parameters:
+    data: 输入数据，形状为(samples, channels)或(segments, samples, channels)
+    sample_rate: 采样率
+    window: 窗函数类型，相同的窗函数、窗长和采样率只计算一次
+    nperseg: 每帧的采样点数，为None时取min(256, samples)
+
+    Returns:
+    freqs: 频率数组
+    psd: 功率谱密度，形状为(segments, channels, frequencies)；输入为二维时为(channels, frequencies)
+    """
+    data = np.asarray(data)
+    if data.ndim not in (2, 3):
+        raise ValueError(f"输入数据应为(samples, channels)或(segments, samples, channels)，实际形状为{data.shape}")
+
+    single = data.ndim == 2
+    if single:
+        data = data[np.newaxis]
+    n_segments, n_samples, n_channels = data.shape
+
+    nperseg = min(256 if nperseg is None else nperseg, n_samples)
+    step = nperseg - nperseg // 2
+    win, scale, freqs = _welch_window(window, nperseg, float(sample_rate))
+
+    # 按分段分块，使帧数组和频谱的临时内存不超过SPECTRAL_BLOCK_BYTES
+    n_frames = (n_samples - nperseg) // step + 1
+    per_segment = n_frames * nperseg * n_channels * 2 * np.dtype(np.float64).itemsize
+    block = max(1, SPECTRAL_BLOCK_BYTES // per_segment)
+
+    psd = np.empty((n_segments, n_channels, len(freqs)))
+    for start in range(0, n_segments, block):
+        # 帧为跨步视图，形状为(segments, frames, channels, nperseg)
+        frames = sliding_window_view(data[start:start + block], nperseg, axis=1)[:, ::step]
+        psd[start:start + block] = _frame_power(frames, win).mean(axis=1)
+
+    _one_sided_density(psd, scale, nperseg)
+    return freqs, psd[0] if single else psd
+
+
+def spectral_analysis(data: np.ndarray, sample_rate: int, window: str = 'hann', average: bool = True):
     """
     Description: EEG频域分析
     -------------------------------
@@ -11,131 +85,490 @@ def spectral_analysis(data: np.ndarray, sample_rate: int, window: str = 'hann'):
     data: 输入数据，形状为(samples, channels)或(segments, samples, channels)
     sample_rate: 采样率
     window: 窗函数类型
+    average: 输入为分段数据时是否对各分段的功率谱取平均
 
     Returns:
     freqs: 频率数组
-    psd: 功率谱密度，形状为(channels, frequencies)
+    psd: 功率谱密度，形状为(channels, frequencies)；分段数据且average为False时为(segments, channels, frequencies)
     """
-    if len(data.shape) == 3:
+    freqs, psd = welch_psd(data, sample_rate, window)
+    if psd.ndim == 3 and average:
         # 如果是分段数据，计算平均功率谱
-        freqs = None
-        psd_sum = None
-
-        for i in range(data.shape[0]):
-            for ch in range(data.shape[2]):
-                f, p = signal.welch(data[i, :, ch], fs=sample_rate, window=window,
-                                    nperseg=min(256, data.shape[1]))
-                if psd_sum is None:
-                    freqs = f
-                    psd_sum = np.zeros((data.shape[2], len(f)))
-                psd_sum[ch] += p
-
-        psd = psd_sum / data.shape[0]
-    else:
-        # 对每个通道分别计算功率谱
-        freqs = None
-        psd = None
-
-        for ch in range(data.shape[1]):
-            f, p = signal.welch(data[:, ch], fs=sample_rate, window=window,
-                                nperseg=min(256, data.shape[0]))
-            if psd is None:
-                freqs = f
-                psd = np.zeros((data.shape[1], len(f)))
-            psd[ch] = p
-
+        psd = psd.mean(axis=0)
     return freqs, psd
 
 
-def extract_features(data: np.ndarray, sample_rate: int):
+EEG_BANDS = {
+    'delta': (0.5, 4),
+    'theta': (4, 8),
+    'alpha': (8, 13),
+    'beta': (13, 30),
+    'gamma': (30, 100),
+}
+
+
+TIME_DOMAIN_FEATURES = ('mean', 'std', 'var', 'max', 'min', 'ptp', 'skewness', 'kurtosis',
+                        'rms', 'energy', 'zero_crossing_rate', 'hjorth')
+SPECTRAL_FEATURES = ('band_power', 'spectral_entropy', 'median_frequency', 'mean_frequency')
+
+@lru_cache(maxsize=32)
+def _band_weights(bands: tuple, freqs: bytes) -> np.ndarray:
+    """按(频段表, 频率数组)缓存的频段权重矩阵，频段包含上下边界"""
+    freqs = np.frombuffer(freqs, dtype=np.float64)
+    edges = np.array([edge for _, edge in bands], dtype=np.float64).reshape(-1, 2)
+    weights = ((freqs >= edges[:, :1]) & (freqs <= edges[:, 1:])).astype(np.float64)
+    weights.flags.writeable = False
+    return weights
+
+
+def band_weights(freqs: np.ndarray, bands: dict = None) -> np.ndarray:
+    """
+    Description: 生成频段权重矩阵，频段功率为功率谱与其转置的乘积；相同的频段表和频率数组只计算一次
+    -------------------------------
+    Parameters:
+    freqs: 频率数组
+    bands: 频段表，键为频段名，值为(下限, 上限)（Hz），为None时使用EEG_BANDS
+
+    Returns:
+    weights: 形状为(bands, frequencies)的只读权重矩阵，行顺序与bands一致
+    """
+    bands = EEG_BANDS if bands is None else bands
+    for name, (low, high) in bands.items():
+        if low > high:
+            raise ValueError(f"频段{name}的下限{low}Hz大于上限{high}Hz")
+    key = tuple((name, (float(low), float(high))) for name, (low, high) in bands.items())
+    return _band_weights(key, np.ascontiguousarray(freqs, dtype=np.float64).tobytes())
+
+
+_FEATURE_NODES = {}    # 节点名 -> 计算函数
+_FEATURE_SOURCES = {}  # 特征名 -> 提供该特征的节点名
+
+
+def register_feature(node: str, provides: tuple = ()):
     """
-    Description: 提取EEG特征
+    Description: 注册特征节点的装饰器。节点函数接收FeatureSet，通过feature_set.node(节点名)获取依赖节点的结果，
+                 返回包含provides中各特征（以及供其他节点使用的中间结果）的字典；
+                 节点在第一次被请求时计算，同一FeatureSet中只计算一次
+    -------------------------------
+    Parameters:
+    node: 节点名
+    provides: 节点提供的特征名
+    """
+    def decorator(func):
+        _FEATURE_NODES[node] = func
+        for name in provides:
+            _FEATURE_SOURCES[name] = node
+        return func
+    return decorator
+
+
+class FeatureSet(Mapping):
+    # 子类可用其他实现替换某些节点，键为节点名
+    _node_overrides = {}
+
+    def __init__(self, data: np.ndarray = None, sample_rate: int = None, bands: dict = None, psd: tuple = None):
+        """
+        Description: 按需计算的特征集合。按特征名取值时只计算该特征及其依赖的中间结果（功率谱、矩、差分等），
+                     共享的中间结果只计算一次，未请求的特征不会被计算；可作为只读字典使用
+        -------------------------------
+        Parameters:
+        data: 输入数据，形状为(segments, samples, channels)，只计算频域特征且提供psd时可为None
+        sample_rate: 采样率，计算频域特征时需要
+        bands: 频段表，键为频段名，值为(下限, 上限)（Hz），为None时使用EEG_BANDS
+        psd: 已计算的(freqs, psd)，提供时不再由data计算功率谱
+        """
+        if data is not None:
+            data = np.asarray(data)
+            if data.ndim != 3:
+                raise ValueError(f"输入数据应为(segments, samples, channels)，实际形状为{data.shape}")
+        self.data = data
+        self.sample_rate = sample_rate
+        self.bands = EEG_BANDS if bands is None else bands
+        for name in self.bands:
+            if name in _FEATURE_SOURCES:
+                raise ValueError(f"频段名{name}与特征名冲突")
+
+        self._nodes = {}
+        if psd is not None:
+            self._nodes['psd'] = {'freqs': np.asarray(psd[0]), 'psd': np.asarray(psd[1])}
+
+    def node(self, name: str) -> dict:
+        """获取节点的结果，第一次请求时计算"""
+        if name not in self._nodes:
+            self._nodes[name] = self._node_overrides.get(name, _FEATURE_NODES[name])(self)
+        return self._nodes[name]
+
+    def segments(self) -> np.ndarray:
+        """时域节点使用的输入数据"""
+        if self.data is None:
+            raise ValueError("计算时域特征需要输入数据")
+        return self.data
+
+    def __getitem__(self, name: str):
+        if name in self.bands:
+            return self.node('band_energy')[name]
+        if name not in _FEATURE_SOURCES:
+            raise KeyError(f"未知的特征: {name}")
+        return self.node(_FEATURE_SOURCES[name])[name]
+
+    def __iter__(self):
+        yield from TIME_DOMAIN_FEATURES
+        yield from self.bands
+        yield from (name for name in _FEATURE_SOURCES
+                    if name not in TIME_DOMAIN_FEATURES)
+
+    def __len__(self) -> int:
+        return len(_FEATURE_SOURCES) + len(self.bands)
+
+    def compute(self, names=None) -> dict:
+        """
+        Description: 计算指定的特征
+        -------------------------------
+        Parameters:
+        names: 特征名列表，为None时计算所有特征
+
+        Returns:
+        features: 特征字典
+        """
+        return {name: self[name] for name in (self if names is None else names)}
+
+
+@register_feature('moments', provides=('mean', 'var', 'std', 'energy', 'rms'))
+def _moments_node(features: FeatureSet) -> dict:
+    """均值和方差，一次去均值；能量和均方根由矩得到：sum(x^2) = n * (var + mean^2)"""
+    data = features.segments()
+    n_samples = data.shape[1]
+    mean = data.mean(axis=1, dtype=np.float64)
+    var = ((data - mean[:, np.newaxis]) ** 2).mean(axis=1)
+    energy = n_samples * (var + mean ** 2)
+    return {'mean': mean, 'var': var, 'std': np.sqrt(var),
+            'energy': energy, 'rms': np.sqrt(energy / n_samples)}
+
+
+@register_feature('shape', provides=('skewness', 'kurtosis'))
+def _shape_node(features: FeatureSet) -> dict:
+    """三阶、四阶中心矩，复用moments节点的均值和方差"""
+    data = features.segments()
+    moments = features.node('moments')
+    centered = data - moments['mean'][:, np.newaxis]
+    squared = centered ** 2
+    m3 = np.einsum('sic,sic->sc', squared, centered) / data.shape[1]
+    m4 = np.einsum('sic,sic->sc', squared, squared) / data.shape[1]
+    var = moments['var']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # 峰度为Fisher定义，与scipy.stats.kurtosis一致
+        return {'skewness': m3 / var ** 1.5, 'kurtosis': m4 / var ** 2 - 3}
+
+
+@register_feature('extrema', provides=('max', 'min', 'ptp'))
+def _extrema_node(features: FeatureSet) -> dict:
+    data = features.segments()
+    maximum = data.max(axis=1)
+    minimum = data.min(axis=1)
+    return {'max': maximum, 'min': minimum, 'ptp': maximum - minimum}
+
+
+@register_feature('zero_crossing_rate', provides=('zero_crossing_rate',))
+def _zero_crossing_node(features: FeatureSet) -> dict:
+    data = features.segments()
+    sign = np.signbit(data)
+    crossings = np.count_nonzero(sign[:, 1:] != sign[:, :-1], axis=1)
+    return {'zero_crossing_rate': crossings / (data.shape[1] - 1)}
+
+
+@register_feature('hjorth', provides=('hjorth',))
+def _hjorth_node(features: FeatureSet) -> dict:
+    """Hjorth参数，复用moments节点的方差"""
+    data = features.segments()
+    if data.shape[1] < 3:
+        raise ValueError(f"Hjorth参数至少需要3个采样点，但只有{data.shape[1]}个")
+    return {'hjorth': _hjorth_kernel(data, features.node('moments')['var'])}
+
+
+@register_feature('psd', provides=())
+def _psd_node(features: FeatureSet) -> dict:
+    if features.sample_rate is None:
+        raise ValueError("计算频域特征需要采样率")
+    freqs, psd = welch_psd(features.segments(), features.sample_rate)
+    return {'freqs': freqs, 'psd': psd}
+
+
+@register_feature('total_power', provides=())
+def _total_power_node(features: FeatureSet) -> dict:
+    return {'total_power': features.node('psd')['psd'].sum(axis=-1)}
+
+
+@register_feature('band_energy', provides=('band_power',))
+def _band_energy_node(features: FeatureSet) -> dict:
+    """各频段能量（键为频段名）和频段能量占比，由缓存的频段权重矩阵一次计算"""
+    spectrum = features.node('psd')
+    band_energy = np.einsum('...f,bf->...b', spectrum['psd'], band_weights(spectrum['freqs'], features.bands))
+    result = {name: band_energy[..., k] for k, name in enumerate(features.bands)}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result['band_power'] = band_energy / features.node('total_power')['total_power'][..., np.newaxis]
+    return result
+
+
+@register_feature('spectral_entropy', provides=('spectral_entropy',))
+def _spectral_entropy_node(features: FeatureSet) -> dict:
+    psd = features.node('psd')['psd']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        psd_norm = psd / features.node('total_power')['total_power'][..., np.newaxis]
+    return {'spectral_entropy': -np.sum(psd_norm * np.log2(psd_norm + 1e-10), axis=-1)}
+
+
+@register_feature('median_frequency', provides=('median_frequency',))
+def _median_frequency_node(features: FeatureSet) -> dict:
+    """中值频率为累积功率首次达到总功率一半的频率"""
+    spectrum = features.node('psd')
+    cumsum = np.cumsum(spectrum['psd'], axis=-1)
+    return {'median_frequency': spectrum['freqs'][np.argmax(cumsum >= cumsum[..., -1:] / 2, axis=-1)]}
+
+
+@register_feature('mean_frequency', provides=('mean_frequency',))
+def _mean_frequency_node(features: FeatureSet) -> dict:
+    """平均频率为功率加权的频率"""
+    spectrum = features.node('psd')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {'mean_frequency': spectrum['psd'] @ spectrum['freqs'] / features.node('total_power')['total_power']}
+
+
+def band_power_features(freqs: np.ndarray, psd: np.ndarray, bands: dict = None) -> dict:
+    """
+    Description: 由功率谱批量计算频段能量、频段能量占比、谱熵、中值频率和平均频率
+    -------------------------------
+    Parameters:
+    freqs: 频率数组
+    psd: 功率谱密度，形状为(..., frequencies)，如welch_psd返回的(segments, channels, frequencies)
+    bands: 频段表，键为频段名，值为(下限, 上限)（Hz），为None时使用EEG_BANDS
+
+    Returns:
+    features: 特征字典，各频段能量的键为频段名，形状为psd.shape[:-1]；
+              'band_power'为各频段能量占比，形状为(..., bands)
+    """
+    features = FeatureSet(bands=bands, psd=(freqs, psd))
+    return features.compute(list(features.bands) + list(SPECTRAL_FEATURES))
+
+
+def _hjorth_kernel(data: np.ndarray, activity: np.ndarray):
+    """
+    由形状为(segments, samples, channels)的数据和已计算的方差得到Hjorth参数。
+    一阶差分只计算一次；二阶差分的平方和由一阶差分展开得到，不再生成二阶差分数组
+    """
+    n_samples = data.shape[1]
+    dx = np.subtract(data[:, 1:], data[:, :-1], dtype=np.float64)
+
+    # 差分的均值只取决于首尾：mean(dx) = (x[-1] - x[0]) / (n - 1)
+    dx_mean = (data[:, -1] - data[:, 0]) / (n_samples - 1)
+    dx_sq = np.einsum('sic,sic->sc', dx, dx)
+    var_dx = dx_sq / (n_samples - 1) - dx_mean ** 2
+
+    # sum(ddx^2) = sum(dx[1:]^2) + sum(dx[:-1]^2) - 2 * sum(dx[1:] * dx[:-1])
+    ddx_mean = (dx[:, -1] - dx[:, 0]) / (n_samples - 2)
+    ddx_sq = (2 * dx_sq - dx[:, 0] ** 2 - dx[:, -1] ** 2
+              - 2 * np.einsum('sic,sic->sc', dx[:, 1:], dx[:, :-1]))
+    var_ddx = ddx_sq / (n_samples - 2) - ddx_mean ** 2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mobility = np.sqrt(var_dx / activity)
+        complexity = np.sqrt(var_ddx / var_dx) / mobility
+    return np.stack([activity, mobility, complexity], axis=-1)
+
+
+def time_domain_features(data: np.ndarray) -> dict:
+    """
+    Description: 批量计算时域特征和Hjorth参数。能量、均方根和Hjorth参数复用均值和方差，
+                 Hjorth参数复用一阶差分，不再对每个分段、每个通道分别调用np.var
     -------------------------------
     Parameters:
     data: 输入数据，形状为(segments, samples, channels)
-    sample_rate: 采样率
 
     Returns:
-    features: 特征字典
+    features: 特征字典，'hjorth'的形状为(segments, channels, 3)，其余特征的形状为(segments, channels)
     """
-    features = {}
+    return FeatureSet(data).compute(TIME_DOMAIN_FEATURES)
 
-    # 时域特征
-    features['mean'] = np.mean(data, axis=1)  # 平均值
-    features['std'] = np.std(data, axis=1)    # 标准差
-    features['var'] = np.var(data, axis=1)    # 方差
-    features['max'] = np.max(data, axis=1)    # 最大值
-    features['min'] = np.min(data, axis=1)    # 最小值
-    features['ptp'] = np.ptp(data, axis=1)    # 峰峰值
-    features['skewness'] = stats.skew(data, axis=1)  # 偏度
-    features['kurtosis'] = stats.kurtosis(data, axis=1)  # 峰度
-    features['rms'] = np.sqrt(np.mean(np.square(data), axis=1))  # 均方根
-    features['energy'] = np.sum(np.square(data), axis=1)  # 能量
-
-    # 计算过零率
-    zero_crosses = np.diff(np.signbit(data), axis=1).sum(axis=1)
-    features['zero_crossing_rate'] = zero_crosses / (data.shape[1] - 1)
-
-    # 频域特征
-    features['delta'] = np.zeros((data.shape[0], data.shape[2]))  # (0.5-4 Hz)
-    features['theta'] = np.zeros((data.shape[0], data.shape[2]))  # (4-8 Hz)
-    features['alpha'] = np.zeros((data.shape[0], data.shape[2]))  # (8-13 Hz)
-    features['beta'] = np.zeros((data.shape[0], data.shape[2]))   # (13-30 Hz)
-    features['gamma'] = np.zeros((data.shape[0], data.shape[2]))  # (30-100 Hz)
-    features['band_power'] = np.zeros((data.shape[0], data.shape[2], 5))  # 各频段能量
-    features['spectral_entropy'] = np.zeros((data.shape[0], data.shape[2]))  # 谱熵
-    features['median_frequency'] = np.zeros((data.shape[0], data.shape[2]))  # 中值频率
-    features['mean_frequency'] = np.zeros((data.shape[0], data.shape[2]))    # 平均频率
-
-    for i in range(data.shape[0]):  # 对每个片段
-        freqs, psd = spectral_analysis(data[i], sample_rate)  # psd shape: (channels, frequencies)
-
-        # 提取各频段能量
-        delta_mask = (freqs >= 0.5) & (freqs <= 4)
-        theta_mask = (freqs >= 4) & (freqs <= 8)
-        alpha_mask = (freqs >= 8) & (freqs <= 13)
-        beta_mask = (freqs >= 13) & (freqs <= 30)
-        gamma_mask = (freqs >= 30) & (freqs <= 100)
-
-        # 计算各频段能量
-        for ch in range(data.shape[2]):
-            features['delta'][i, ch] = np.sum(psd[ch, delta_mask])
-            features['theta'][i, ch] = np.sum(psd[ch, theta_mask])
-            features['alpha'][i, ch] = np.sum(psd[ch, alpha_mask])
-            features['beta'][i, ch] = np.sum(psd[ch, beta_mask])
-            features['gamma'][i, ch] = np.sum(psd[ch, gamma_mask])
-            
-            # 计算频段能量占比
-            total_power = np.sum(psd[ch])
-            features['band_power'][i, ch] = [
-                features['delta'][i, ch] / total_power,
-                features['theta'][i, ch] / total_power,
-                features['alpha'][i, ch] / total_power,
-                features['beta'][i, ch] / total_power,
-                features['gamma'][i, ch] / total_power
-            ]
-            
-            # 计算谱熵
-            psd_norm = psd[ch] / np.sum(psd[ch])
-            features['spectral_entropy'][i, ch] = -np.sum(psd_norm * np.log2(psd_norm + 1e-10))
-            
-            # 计算中值频率和平均频率
-            cumsum = np.cumsum(psd[ch])
-            features['median_frequency'][i, ch] = freqs[np.where(cumsum >= cumsum[-1]/2)[0][0]]
-            features['mean_frequency'][i, ch] = np.sum(freqs * psd[ch]) / np.sum(psd[ch])
-
-    # 非线性特征
-    features['hjorth'] = np.zeros((data.shape[0], data.shape[2], 3))  # Hjorth参数
-
-    for i in range(data.shape[0]):
-        for ch in range(data.shape[2]):
-            # Hjorth参数
-            activity, mobility, complexity = hjorth_parameters(data[i, :, ch])
-            features['hjorth'][i, ch] = [activity, mobility, complexity]
 
+def extract_features(data: np.ndarray, sample_rate: int, bands: dict = None, features: list = None):
+    """
+    Description: 提取EEG特征，只计算请求的特征及其依赖的中间结果
+    -------------------------------
+    Parameters:
+    data: 输入数据，形状为(segments, samples, channels)
+    sample_rate: 采样率
+    bands: 频段表，参见band_power_features，为None时使用EEG_BANDS
+    features: 需要的特征名列表（如['alpha', 'beta', 'mean']），为None时计算所有特征
 
+    Returns:
+    features: 特征字典
+    """
+    return FeatureSet(data, sample_rate, bands).compute(features)
+
+
+def _window_sums(values: np.ndarray, starts: np.ndarray, length: int) -> np.ndarray:
+    """由前缀和计算从各起点开始、长度为length的窗口内的和，values形状为(samples, channels)"""
+    prefix = np.zeros((len(values) + 1, values.shape[1]), dtype=np.result_type(values.dtype, np.float64))
+    np.cumsum(values, axis=0, out=prefix[1:])
+    return prefix[starts + length] - prefix[starts]
+
+
+class SlidingFeatureSet(FeatureSet):
+    def __init__(self, signal: np.ndarray, sample_rate: int, window: float, frame: float, bands: dict = None,
+                 psd_step: int = None):
+        """
+        Description: 连续信号滑动窗口的增量特征集合，窗口与segmentEEG的分段一致。
+                     均值、方差、均方根、能量、过零率和Hjorth参数由前缀和在每个窗移上更新，
+                     功率谱为各窗口内帧功率谱的平均，相邻窗口共享的帧只计算一次，参见_sliding_psd_node；
+                     其他特征在分段视图上计算。默认结果与对分段调用extract_features相同
+        -------------------------------
+        Parameters:
+        signal: 连续信号，形状为(samples, channels)
+        sample_rate: 采样率
+        window: 窗的大小（单位：s）
+        frame: 窗移的大小（单位：s）
+        bands: 频段表，为None时使用EEG_BANDS
+        psd_step: 功率谱的帧移（采样点数），为None时与welch_psd相同（nperseg // 2，默认128个采样点）。
+                  窗移不是128的整数倍时（如0.1 s），可取窗移的约数使所有帧在窗口间共享，
+                  此时功率谱为noverlap = nperseg - psd_step的Welch估计，与extract_features的结果不同
+        """
+        signal = np.asarray(signal)
+        if signal.ndim != 2:
+            raise ValueError(f"输入信号应为(samples, channels)，实际形状为{signal.shape}")
+        self.window_samples = int(window * sample_rate)
+        self.hop = int(frame * sample_rate)
+        if psd_step is not None and not 1 <= psd_step <= min(256, self.window_samples):
+            raise ValueError(f"功率谱帧移应在1到{min(256, self.window_samples)}个采样点之间，实际为{psd_step}")
+        if self.window_samples < 3 or self.hop < 1:
+            raise ValueError(f"窗长至少为3个采样点、窗移至少为1个采样点，实际为{self.window_samples}和{self.hop}")
+
+        n_windows = (signal.shape[0] - self.window_samples) // self.hop + 1
+        if n_windows <= 0:
+            raise ValueError(f"数据长度不足以分段。需要至少{self.window_samples}个采样点，但只有{signal.shape[0]}个")
+        self.signal = signal
+        self.psd_step = psd_step
+        self.starts = np.arange(n_windows) * self.hop
+
+        # 分段为共享信号内存的跨步视图，形状为(segments, samples, channels)
+        segments = sliding_window_view(signal, self.window_samples, axis=0)[::self.hop].transpose(0, 2, 1)
+        super().__init__(segments, sample_rate, bands)
+
+
+def _sliding_moments_node(features: SlidingFeatureSet) -> dict:
+    """窗口内的一阶、二阶矩由前缀和得到；先减去全信号均值，避免长信号的前缀和损失精度"""
+    n = features.window_samples
+    offset = features.signal.mean(axis=0, dtype=np.float64)
+    x = features.signal - offset
+    local_mean = _window_sums(x, features.starts, n) / n
+    var = np.maximum(_window_sums(x * x, features.starts, n) / n - local_mean ** 2, 0)
+    mean = local_mean + offset
+    energy = n * (var + mean ** 2)
+    return {'mean': mean, 'var': var, 'std': np.sqrt(var),
+            'energy': energy, 'rms': np.sqrt(energy / n), 'centered': x}
+
+
+def _sliding_zero_crossing_node(features: SlidingFeatureSet) -> dict:
+    sign = np.signbit(features.signal)
+    crossings = _window_sums(sign[1:] != sign[:-1], features.starts, features.window_samples - 1)
+    return {'zero_crossing_rate': crossings / (features.window_samples - 1)}
+
+
+def _sliding_hjorth_node(features: SlidingFeatureSet) -> dict:
+    """差分的均值由窗口首尾得到，差分的平方和由前缀和得到"""
+    n = features.window_samples
+    starts = features.starts
+    moments = features.node('moments')
+    x = moments['centered']
+    dx = np.diff(x, axis=0)
+    ddx = np.diff(dx, axis=0)
+
+    dx_mean = (x[starts + n - 1] - x[starts]) / (n - 1)
+    var_dx = _window_sums(dx * dx, starts, n - 1) / (n - 1) - dx_mean ** 2
+    ddx_mean = (dx[starts + n - 2] - dx[starts]) / (n - 2)
+    var_ddx = _window_sums(ddx * ddx, starts, n - 2) / (n - 2) - ddx_mean ** 2
+
+    activity = moments['var']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mobility = np.sqrt(var_dx / activity)
+        complexity = np.sqrt(var_ddx / var_dx) / mobility
+    return {'hjorth': np.stack([activity, mobility, complexity], axis=-1)}
+
+
+def _sliding_psd_node(features: SlidingFeatureSet) -> dict:
+    """
+    每个窗口的功率谱为其内部各帧功率谱的平均，帧起点为窗口起点加帧移的整数倍。
+    相邻窗口共享的帧（起点相同）只计算一次：窗移是帧移的整数倍时除首尾外所有帧都被共享，
+    计算量与窗移成正比；否则只共享起点恰好重合的帧。窗口之间没有可共享的帧时（如0.1 s窗移、
+    默认帧移128个采样点），每个窗口的帧都需要单独计算，计算量与逐窗口调用welch_psd相同
+    """
+    n = features.window_samples
+    nperseg = min(256, n)
+    step = features.psd_step or nperseg - nperseg // 2
+    win, scale, freqs = _welch_window('hann', nperseg, float(features.sample_rate))
+    # 各窗口内的帧相对于窗口起点的偏移
+    offsets = np.arange((n - nperseg) // step + 1) * step
+    n_windows, n_channels = len(features.starts), features.signal.shape[1]
+
+    # 按窗口分块，使每块的帧功率谱不超过SPECTRAL_BLOCK_BYTES
+    frame_bytes = n_channels * nperseg * 2 * np.dtype(np.float64).itemsize
+    block = max(1, SPECTRAL_BLOCK_BYTES // (frame_bytes * len(offsets)))
+
+    psd = np.empty((n_windows, n_channels, len(freqs)))
+    if features.hop // np.gcd(features.hop, step) >= len(offsets):
+        # 窗口之间没有起点重合的帧，直接在分段视图上取帧，与welch_psd相同
+        segments = features.segments()
+        for first in range(0, n_windows, block):
+            # 帧为跨步视图，形状为(segments, frames, channels, nperseg)
+            frames = sliding_window_view(segments[first:first + block], nperseg, axis=1)[:, ::step][:, :len(offsets)]
+            psd[first:first + block] = _frame_power(frames, win).mean(axis=1)
+        _one_sided_density(psd, scale, nperseg)
+        return {'freqs': freqs, 'psd': psd}
+
+    for first in range(0, n_windows, block):
+        last = min(first + block, n_windows)
+        begin = features.starts[first]
+        stop = features.starts[last - 1] + n
+        frame_starts = (features.starts[first:last, np.newaxis] - begin) + offsets
+        unique_starts, inverse = np.unique(frame_starts, return_inverse=True)
+        # 帧形状为(frames, channels, nperseg)
+        frames = sliding_window_view(features.signal[begin:stop], nperseg, axis=0)[unique_starts]
+        power = _frame_power(frames, win)
+        inverse = inverse.reshape(frame_starts.shape)
+        total = power[inverse[:, 0]]
+        for k in range(1, len(offsets)):
+            total += power[inverse[:, k]]
+        psd[first:last] = total / len(offsets)
+
+    _one_sided_density(psd, scale, nperseg)
+    return {'freqs': freqs, 'psd': psd}
+
+
+SlidingFeatureSet._node_overrides = {
+    'moments': _sliding_moments_node,
+    'zero_crossing_rate': _sliding_zero_crossing_node,
+    'hjorth': _sliding_hjorth_node,
+    'psd': _sliding_psd_node,
+}
+
+
+def sliding_window_features(signal: np.ndarray, sample_rate: int, window: float, frame: float,
+                            bands: dict = None, features: list = None, psd_step: int = None):
+    """
+    Description: 增量计算连续信号各滑动窗口的特征，窗口与segmentEEG(signal, window, frame, sample_rate)一致，
+                 结果与对分段调用extract_features相同
+    -------------------------------
+    Parameters:
+    signal: 连续信号，形状为(samples, channels)
+    sample_rate: 采样率
+    window: 窗的大小（单位：s）
+    frame: 窗移的大小（单位：s）
+    bands: 频段表，为None时使用EEG_BANDS
+    features: 需要的特征名列表，为None时计算所有特征
+    psd_step: 功率谱的帧移，为None时与welch_psd相同；指定时功率谱与extract_features不同，参见SlidingFeatureSet
 
-    return features
+    Returns:
+    features: 特征字典，各特征的第一维为窗口
+    """
+    return SlidingFeatureSet(signal, sample_rate, window, frame, bands, psd_step).compute(features)
 
 
 def nonlinear_features(data: np.ndarray):
@@ -150,30 +583,34 @@ def nonlinear_features(data: np.ndarray):
     """
     features = {}
 
+    # Hjorth参数，所有通道一次计算
+    activity, mobility, complexity = hjorth_parameters(data, axis=0)
     for ch in range(data.shape[1]):
-
-
-        # Hjorth参数
-        activity, mobility, complexity = hjorth_parameters(data[:, ch])
-        features[f'hjorth_activity_ch{ch}'] = activity
-        features[f'hjorth_mobility_ch{ch}'] = mobility
-        features[f'hjorth_complexity_ch{ch}'] = complexity
-
+        features[f'hjorth_activity_ch{ch}'] = activity[ch]
+        features[f'hjorth_mobility_ch{ch}'] = mobility[ch]
+        features[f'hjorth_complexity_ch{ch}'] = complexity[ch]
 
     return features
 
 
-def hjorth_parameters(x):
-    """计算Hjorth参数"""
-    dx = np.diff(x)
-    ddx = np.diff(dx)
-
-    activity = np.var(x)
-    mobility = np.sqrt(np.var(dx) / activity)
-    complexity = np.sqrt(np.var(ddx) / np.var(dx)) / mobility
-
-    return activity, mobility, complexity
-
-
-
+def hjorth_parameters(x, axis: int = -1):
+    """
+    Description: 计算Hjorth参数
+    -------------------------------
+    Parameters:
+    x: 输入信号，时间轴由axis指定
+    axis: 时间轴
 
+    Returns:
+    activity: 活动度，形状为去掉时间轴后的形状，一维输入时为标量
+    mobility: 移动度
+    complexity: 复杂度
+    """
+    x = np.moveaxis(np.asarray(x), axis, 0)
+    shape = x.shape[1:]
+    x = x.reshape(1, x.shape[0], -1)
+
+    mean = x.mean(axis=1, dtype=np.float64)
+    activity = ((x - mean[:, np.newaxis]) ** 2).mean(axis=1)
+    hjorth = _hjorth_kernel(x, activity)[0].reshape(shape + (3,))
+    return hjorth[..., 0][()], hjorth[..., 1][()], hjorth[..., 2][()]
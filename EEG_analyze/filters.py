@@ -0,0 +1,202 @@
+"""
+EEG滤波器模块
+
+统一设计和应用EEG分析中使用的IIR滤波器。滤波器以二阶节(SOS)形式设计，数值上比(b, a)形式稳定；
+设计结果按(类型, 阶数, 截止频率, 采样率)缓存，高通、低通、陷波等多级滤波器合并为一组二阶节，
+对所有通道沿时间轴一次完成零相位滤波。
+
+主要函数:
+- design_filter: 设计单个滤波器（带缓存）
+- design_cascade: 将多级滤波器合并为一组二阶节（带缓存）
+- bandpass_stages: 根据通带和陷波频率生成滤波级定义
+- filter_eeg: 对多通道数据进行零相位滤波
+
+主要类:
+- StreamingFilter: 逐块因果滤波器，在调用之间保存滤波器状态，用于在线处理
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+
+FILTER_TYPES = ('highpass', 'lowpass', 'bandpass', 'bandstop', 'notch')
+
+
+@lru_cache(maxsize=128)
+def _design_filter(btype: str, order: int, cutoff, sample_rate: float) -> np.ndarray:
+    """按(类型, 阶数, 截止频率, 采样率)缓存的滤波器设计，缓存的数组不对外暴露"""
+    if btype not in FILTER_TYPES:
+        raise ValueError(f"不支持的滤波器类型: {btype}")
+
+    nyquist = sample_rate / 2
+    edges = np.atleast_1d(cutoff)
+    if np.any(edges <= 0) or np.any(edges >= nyquist):
+        raise ValueError(f"截止频率{cutoff}必须位于(0, {nyquist})Hz之间")
+
+    if btype == 'notch':
+        b, a = signal.iirnotch(float(cutoff), order, fs=sample_rate)
+        return signal.tf2sos(b, a)
+    return signal.butter(order, cutoff, btype=btype, fs=sample_rate, output='sos')
+
+
+@lru_cache(maxsize=128)
+def _design_cascade(stages: tuple, sample_rate: float) -> np.ndarray:
+    if not stages:
+        raise ValueError("至少需要一级滤波器")
+    return np.vstack([_design_filter(btype, order, cutoff, sample_rate)
+                      for btype, order, cutoff in stages])
+
+
+def design_filter(btype: str, order: int, cutoff, sample_rate: float) -> np.ndarray:
+    """
+    Description: 设计Butterworth滤波器或陷波器，返回二阶节系数，相同参数的设计结果会被缓存
+    -------------------------------
+    Parameters:
+    btype: 滤波器类型，'highpass'、'lowpass'、'bandpass'、'bandstop'或'notch'
+    order: 滤波器阶数；陷波器时为品质因数Q
+    cutoff: 截止频率（Hz），带通/带阻为(低, 高)元组，陷波器为中心频率
+    sample_rate: 采样率（Hz）
+
+    Returns:
+    sos: 形状为(sections, 6)的二阶节系数数组
+    """
+    if isinstance(cutoff, list):
+        cutoff = tuple(cutoff)
+    return _design_filter(btype, order, cutoff, sample_rate).copy()
+
+
+def design_cascade(stages: tuple, sample_rate: float) -> np.ndarray:
+    """
+    Description: 将多级滤波器合并为一组二阶节，一次滤波即可完成所有级
+    -------------------------------
+    Parameters:
+    stages: 滤波级元组，每级为(类型, 阶数, 截止频率)，参见design_filter
+    sample_rate: 采样率（Hz）
+
+    Returns:
+    sos: 形状为(sections, 6)的二阶节系数数组
+    """
+    return _design_cascade(tuple(stages), sample_rate).copy()
+
+
+def bandpass_stages(filter_band: tuple = (0.5, 45), notch_freq: float = None,
+                    order: int = 4, notch_q: float = 30.0) -> tuple:
+    """
+    Description: 根据通带和陷波频率生成滤波级定义，供design_cascade使用
+    -------------------------------
+    Parameters:
+    filter_band: 通带(高通截止频率, 低通截止频率)（Hz），任一端为None时不进行该端的滤波
+    notch_freq: 工频陷波频率（Hz），如50或60，为None时不进行陷波
+    order: 高通、低通滤波器的阶数
+    notch_q: 陷波器的品质因数
+
+    Returns:
+    stages: 滤波级元组
+    """
+    low, high = filter_band
+    stages = []
+    if low is not None:
+        stages.append(('highpass', order, float(low)))
+    if high is not None:
+        stages.append(('lowpass', order, float(high)))
+    if notch_freq is not None:
+        stages.append(('notch', notch_q, float(notch_freq)))
+    return tuple(stages)
+
+
+def filter_eeg(data: np.ndarray, sample_rate: float, filter_band: tuple = (0.5, 45),
+               notch_freq: float = None, order: int = 4, axis: int = 0) -> np.ndarray:
+    """
+    Description: 对多通道EEG数据进行零相位滤波，所有通道沿时间轴一次处理
+    -------------------------------
+    Parameters:
+    data: 输入数据，时间轴由axis指定，如形状为(samples, channels)
+    sample_rate: 采样率（Hz）
+    filter_band: 通带(高通截止频率, 低通截止频率)（Hz），参见bandpass_stages
+    notch_freq: 工频陷波频率（Hz），为None时不进行陷波
+    order: 高通、低通滤波器的阶数
+    axis: 时间轴
+
+    Returns:
+    filtered: 滤波后的数据，形状与输入一致
+    """
+    sos = design_cascade(bandpass_stages(filter_band, notch_freq, order), sample_rate)
+    return signal.sosfiltfilt(sos, data, axis=axis)
+
+
+class StreamingFilter:
+    def __init__(self, sample_rate: float, n_channels: int, filter_band: tuple = (0.5, 45),
+                 notch_freq: float = None, order: int = 4):
+        """
+        Description: 逐块因果滤波器。与filter_eeg使用相同的高通、低通和陷波定义，
+                     在调用之间保存各二阶节的状态(zi)，任意长度的数据块依次输入时输出在样本上连续
+        -------------------------------
+        Parameters:
+        sample_rate: 采样率（Hz）
+        n_channels: 通道数
+        filter_band: 通带(高通截止频率, 低通截止频率)（Hz），参见bandpass_stages
+        notch_freq: 工频陷波频率（Hz），为None时不进行陷波
+        order: 高通、低通滤波器的阶数
+        """
+        self.sample_rate = sample_rate
+        self.n_channels = n_channels
+        self.sos = design_cascade(bandpass_stages(filter_band, notch_freq, order), sample_rate)
+
+        # 单位阶跃输入的稳态状态，首个样本到来时按其幅值缩放，避免直流偏置引起的启动瞬态
+        self._zi_step = signal.sosfilt_zi(self.sos)[:, :, np.newaxis]
+        self.zi = np.zeros((self.sos.shape[0], 2, n_channels))
+        self._initialized = False
+
+    def reset(self):
+        """清除滤波器状态，下一个数据块视为新信号的开始"""
+        self.zi[...] = 0
+        self._initialized = False
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Description: 对一个数据块进行因果滤波，并更新滤波器状态。数据块直接交给signal.sosfilt，转换为float64的
+                     复制只在其内部进行一次，新的状态直接取自sosfilt的返回值而不再复制；scipy没有提供
+                     写入已有数组的公开接口，因此每次调用仍会分配输出和状态数组（与数据块大小成正比）
+        -------------------------------
+        Parameters:
+        chunk: 数据块，形状为(samples, channels)，单个样本可为(channels,)
+
+        Returns:
+        filtered: 滤波后的数据块，形状与chunk一致
+        """
+        chunk = np.asarray(chunk)
+        single = chunk.ndim == 1
+        if single:
+            chunk = chunk[np.newaxis]
+        if chunk.ndim != 2 or chunk.shape[1] != self.n_channels:
+            raise ValueError(f"数据块应为(samples, {self.n_channels})，实际形状为{chunk.shape}")
+        if chunk.shape[0] == 0:
+            return chunk.astype(np.float64)
+
+        if not self._initialized:
+            self.zi[...] = self._zi_step * chunk[0]
+            self._initialized = True
+
+        filtered, self.zi = signal.sosfilt(self.sos, chunk, axis=0, zi=self.zi)
+
+        return filtered[0] if single else filtered
+
+    def group_delay(self, freqs) -> np.ndarray:
+        """
+        Description: 计算给定频率处的群延迟，即在线滤波引入的延迟
+        -------------------------------
+        Parameters:
+        freqs: 频率（Hz），标量或数组
+
+        Returns:
+        delay: 各频率的群延迟（单位：s）
+        """
+        freqs = np.atleast_1d(np.asarray(freqs, dtype=np.float64))
+        delay = np.zeros_like(freqs)
+        # 逐个二阶节计算后相加，比合并为高阶(b, a)形式数值稳定
+        for section in self.sos:
+            _, gd = signal.group_delay((section[:3], section[3:]), w=freqs, fs=self.sample_rate)
+            delay += gd
+        return delay / self.sample_rate
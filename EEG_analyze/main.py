@@ -1,9 +1,13 @@
 import numpy as np
 import os
 import pandas as pd
-from data_loader import loadEEGData
-from preprocessor import preprocess_eeg, augment_eeg
-from feature_extractor import extract_features, spectral_analysis
+try:
+    import h5py
+except ImportError:
+    h5py = None
+from data_loader import loadEEGSignal, segmentEEG
+from preprocessor import preprocess_eeg, augment_eeg, save_eeg_data
+from feature_extractor import extract_features, spectral_analysis, sliding_window_features
 from analyzer import EEGAnalyzer
 from visualizer import EEGVisualizer
 
@@ -21,7 +25,8 @@ class EEGProcessor:
         self.visualizer = EEGVisualizer(sample_rate)
 
     def process_file(self, file_path: str, window_size: float = 2.0,
-                     overlap: float = 0.5, preprocess_methods: list = None):
+                     overlap: float = 0.5, preprocess_methods: list = None,
+                     mmap_mode: str = None, segments=None, report_memory: bool = False):
         """
         Description: 处理单个EEG文件
         -------------------------------
@@ -30,24 +35,58 @@ class EEGProcessor:
         window_size: 窗口大小(秒)
         overlap: 重叠比例
         preprocess_methods: 预处理方法列表
+        mmap_mode: NPY文件的内存映射模式（如'r'），用于处理超过内存大小的记录
+        segments: 需要处理的分段（切片或索引数组），为None时处理全部分段；预处理仍在完整的连续信号上进行，
+                  所选分段的特征与处理全部分段时对应分段的特征相同
+        report_memory: 是否统计预处理各阶段的内存峰值，结果在preprocess_params['memory']中
 
         Returns:
         results: 处理结果字典
         """
         try:
-            # 1. 加载数据
+            # 1. 加载连续信号
             print(f"正在加载数据: {file_path}")
-            data = loadEEGData(file_path, window_size, overlap, self.sample_rate,channels=4)
+            signal_data, ch_names = loadEEGSignal(file_path, self.sample_rate, mmap_mode=mmap_mode)
+            if file_path.lower().endswith('.csv') and signal_data.shape[1] != 4:
+                raise ValueError(f"期望4个通道，但数据中有{signal_data.shape[1]}个通道")
 
-            # 2. 预处理
+            window_samples = int(window_size * self.sample_rate)
+            frame_samples = int(overlap * self.sample_rate)
+            n_segments = max(0, (signal_data.shape[0] - window_samples) // frame_samples + 1)
+
+            segment_indices = None
+            if segments is not None:
+                segment_indices = np.arange(n_segments)[segments]
+            signal_data = np.asarray(signal_data)
+
+            # 2. 预处理：在连续信号上只进行一次，避免重叠分段被重复处理以及分段拼接处的滤波伪迹
             print("正在进行预处理...")
             if preprocess_methods is None:
                 preprocess_methods = ['filter', 'normalize']
-            processed_data, preprocess_params = preprocess_eeg(data, preprocess_methods, self.sample_rate)
-
-            # 3. 特征提取
+            # 加载得到的信号为本函数独有时直接原地处理，不再复制；内存映射或缓存中的只读数据会先复制
+            inplace = (mmap_mode is None and signal_data.dtype.kind == 'f'
+                       and signal_data.flags.writeable and signal_data.flags.c_contiguous)
+            processed_signal, preprocess_params = preprocess_eeg(signal_data, preprocess_methods, self.sample_rate,
+                                                                 inplace=inplace, report_memory=report_memory)
+
+            # 预处理后再分段，分段为共享连续信号内存的只读视图。指定segments时在完整信号上预处理后再选取分段，
+            # 异常值阈值、归一化统计量和滤波的边界效应都与处理全部分段时相同
+            processed_data = segmentEEG(processed_signal, window_size, overlap, self.sample_rate)
+            if segment_indices is not None:
+                processed_data = processed_data[segment_indices]
+                # 之后的时频、相位分析和原始幅值恢复只使用覆盖所选分段的连续区间
+                first = int(segment_indices.min()) if segment_indices.size else 0
+                last = int(segment_indices.max()) if segment_indices.size else 0
+                processed_signal = processed_signal[first * frame_samples:last * frame_samples + window_samples]
+                segment_indices = segment_indices - first
+
+            # 3. 特征提取：处理全部分段时在连续信号上按窗移增量计算，重叠部分不再重复计算；
+            # 功率谱使用与extract_features相同的估计
             print("正在提取特征...")
-            features = extract_features(processed_data, self.sample_rate)
+            if segment_indices is None:
+                features = sliding_window_features(processed_signal, self.sample_rate, window_size, overlap)
+            else:
+                features = extract_features(processed_data, self.sample_rate)
 
             # 4. 数据质量评估
             print("正在评估数据质量...")
@@ -55,15 +94,11 @@ class EEGProcessor:
 
             # 5. 时频分析
             print("正在进行时频分析...")
-            tf_data = self.analyzer.time_frequency_analysis(
-                processed_data.reshape(-1, processed_data.shape[-1])
-            )
+            tf_data = self.analyzer.time_frequency_analysis(processed_signal)
 
             # 6. 相位分析
             print("正在进行相位分析...")
-            phase_data = self.analyzer.phase_analysis(
-                processed_data.reshape(-1, processed_data.shape[-1])
-            )
+            phase_data = self.analyzer.phase_analysis(processed_signal)
 
             # 7. 可视化结果
             print("正在生成可视化结果...")
@@ -78,15 +113,12 @@ class EEGProcessor:
             
             # 保存原始幅值的预处理数据
             if 'mean' in preprocess_params and 'std' in preprocess_params:
-                # 恢复原始幅值
-                original_scale_data = processed_data.copy()
-                if len(original_scale_data.shape) == 3:
-                    # 对于3D数据，需要对每个片段分别处理
-                    for i in range(original_scale_data.shape[0]):
-                        original_scale_data[i] = original_scale_data[i] * preprocess_params['std'] + preprocess_params['mean']
-                else:
-                    original_scale_data = original_scale_data * preprocess_params['std'] + preprocess_params['mean']
-                
+                # 恢复原始幅值：在连续信号上一次广播运算，再取与processed_data相同的分段视图
+                original_scale_signal = processed_signal * preprocess_params['std'] + preprocess_params['mean']
+                original_scale_data = segmentEEG(original_scale_signal, window_size, overlap, self.sample_rate)
+                if segment_indices is not None:
+                    original_scale_data = original_scale_data[segment_indices]
+
                 # 打印调试信息
                 print("\n数据统计信息:")
                 print(f"原始数据均值: {preprocess_params['mean']}")
@@ -117,29 +149,19 @@ class EEGProcessor:
                     csv_path = os.path.join(output_dir, 'processed_data_original_scale.csv')
                     processed_df.to_csv(csv_path, index=False, float_format='%.6f')
                     print(f"\nCSV文件已保存到: {csv_path}")
-                    
-                    # 验证保存的CSV文件
-                    try:
-                        test_df = pd.read_csv(csv_path)
-                        print(f"CSV文件验证 - 形状: {test_df.shape}")
-                        print("CSV文件前5行:")
-                        print(test_df.head())
-                    except Exception as e:
-                        print(f"CSV文件验证失败: {str(e)}")
                 else:
                     print("警告：数据全部为无效值，跳过保存CSV文件")
                 
-                # 保存为NPY文件（保存完整数据）
-                npy_path = os.path.join(output_dir, 'processed_data_original_scale.npy')
-                np.save(npy_path, original_scale_data)
-                print(f"\nNPY文件已保存到: {npy_path}")
-                
-                # 验证保存的NPY文件
-                try:
-                    test_data = np.load(npy_path)
-                    print(f"NPY文件验证 - 形状: {test_data.shape}")
-                except Exception as e:
-                    print(f"NPY文件验证失败: {str(e)}")
+                # 保存为分块压缩的HDF5分段存储（保存完整数据），之后可按分段随机读取；未安装h5py时保存为NPY文件
+                if h5py is not None:
+                    h5_path = os.path.join(output_dir, 'processed_data_original_scale.h5')
+                    save_eeg_data(original_scale_data, h5_path, format='h5', sample_rate=self.sample_rate,
+                                  ch_names=ch_names)
+                    print(f"\n分段存储已保存到: {h5_path}")
+                else:
+                    npy_path = os.path.join(output_dir, 'processed_data_original_scale.npy')
+                    np.save(npy_path, original_scale_data)
+                    print(f"\n未安装h5py，NPY文件已保存到: {npy_path}")
             else:
                 print("警告：未找到预处理参数，无法恢复原始幅值")
             
@@ -202,6 +224,8 @@ class EEGProcessor:
             # 整理返回结果
             results = {
                 'data': processed_data,
+                'signal': processed_signal,
+                'ch_names': ch_names,
                 'features': features,
                 'quality_metrics': quality_metrics,
                 'time_frequency': tf_data,
@@ -0,0 +1,144 @@
+"""
+OSC记录文件读取模块
+
+读取OSCDataReceiver写出的CSV文件（列为Timestamp, Address, Data，Data为参数元组的文本形式），
+不逐行求值，而是按块读取后按地址分组，一次性将Data文本解析为数值数组，并批量转换时间戳。
+
+主要函数:
+- iterOSCCSV: 按块读取OSC记录文件，逐块产生各地址的数值数组
+- readOSCCSV: 读取单个OSC记录文件，返回按地址划分的时间戳和数值数组
+- readOSCFiles: 读取多个OSC记录文件，可多进程并行
+"""
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from time_index import readTimeRange
+
+
+OSC_COLUMNS = ['Timestamp', 'Address', 'Data']
+OSC_TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def isOSCCSV(data_path: str) -> bool:
+    """判断CSV文件是否为OSCDataReceiver写出的记录文件"""
+    with open(data_path, 'r', encoding='utf-8', errors='ignore') as f:
+        header = f.readline().strip()
+    return header.split(',') == OSC_COLUMNS
+
+
+def _matchAddress(address: str, addresses: list = None) -> bool:
+    """地址完全相同，或以'/信号名'结尾（如'eeg'匹配'/8001/eeg'）时视为匹配"""
+    if addresses is None:
+        return True
+    return any(address == a or address.endswith('/' + a.lstrip('/')) for a in addresses)
+
+
+def _parseValues(values: pd.Series) -> np.ndarray:
+    """将'(v1, v2, ...)'形式的参数文本批量解析为形状为(messages, values)的数组"""
+    # 单参数元组的文本形式为'(v,)'，需要去掉末尾的逗号
+    text = '\n'.join(values.str.strip('()"').str.rstrip(','))
+    return pd.read_csv(io.StringIO(text), header=None, dtype=np.float64, skipinitialspace=True).values
+
+
+def iterOSCCSV(data_path: str, addresses: list = None, chunk_size: int = 100000, start=None, end=None):
+    """
+    Description: 按块读取OSC记录文件，逐块产生各地址的时间戳和数值数组，内存占用由chunk_size决定
+    -------------------------------
+    Parameters:
+    data_path: OSC记录CSV文件路径
+    addresses: 需要读取的地址列表，参见readOSCCSV
+    chunk_size: 每次读取的行数
+    start: 起始时间，参见readOSCCSV
+    end: 结束时间（不包含），参见readOSCCSV
+
+    Returns:
+    生成器，每次产生(地址, 形状为(messages,)的Unix时间戳（单位：s）, 形状为(messages, values)的数组)
+    """
+    if start is not None or end is not None:
+        reader = [readTimeRange(data_path, start, end).astype(str)]
+    else:
+        reader = pd.read_csv(data_path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    for chunk in reader:
+        if chunk.columns.tolist() != OSC_COLUMNS:
+            raise ValueError(f"不是OSC记录文件，列名为：{chunk.columns.tolist()}")
+
+        for address, group in chunk.groupby('Address', sort=False):
+            if not _matchAddress(address, addresses):
+                continue
+
+            try:
+                data = _parseValues(group['Data'])
+            except ValueError:
+                print(f"警告：地址 {address} 的数据不是数值，已跳过")
+                continue
+
+            # 时间戳整列转换为纳秒整数后换算为秒
+            ts = pd.to_datetime(group['Timestamp'], format=OSC_TIME_FORMAT).values
+            yield address, ts.astype('datetime64[ns]').astype(np.int64) / 1e9, data
+
+
+def readOSCCSV(data_path: str, addresses: list = None, chunk_size: int = 100000, start=None, end=None):
+    """
+    Description: 读取OSC记录文件，按地址解析为数值数组
+    -------------------------------
+    Parameters:
+    data_path: OSC记录CSV文件路径
+    addresses: 需要读取的地址列表，可写完整地址'/8001/eeg'或信号名'eeg'，为None时读取所有地址
+    chunk_size: 每次读取的行数
+    start: 起始时间（数值秒或'2025-01-16 10:22:27'形式的时间字符串），指定时通过时间索引直接定位
+    end: 结束时间（不包含），指定时通过时间索引直接定位
+
+    Returns:
+    signals: 字典，键为地址，值为{'timestamps': 形状为(messages,)的Unix时间戳（单位：s），
+             'data': 形状为(messages, values)的numpy数组}
+    """
+    timestamps = {}
+    values = {}
+
+    for address, ts, data in iterOSCCSV(data_path, addresses, chunk_size, start, end):
+        timestamps.setdefault(address, []).append(ts)
+        values.setdefault(address, []).append(data)
+
+    signals = {}
+    for address in values:
+        try:
+            data = np.concatenate(values[address])
+        except ValueError:
+            print(f"警告：地址 {address} 的消息参数个数不一致，已跳过")
+            continue
+        signals[address] = {
+            'timestamps': np.concatenate(timestamps[address]),
+            'data': data,
+        }
+
+    return signals
+
+
+def _readOSCCSVArgs(args):
+    return readOSCCSV(*args)
+
+
+def readOSCFiles(data_paths: list, addresses: list = None, chunk_size: int = 100000, workers: int = None):
+    """
+    Description: 读取多个OSC记录文件
+    -------------------------------
+    Parameters:
+    data_paths: OSC记录CSV文件路径列表
+    addresses: 需要读取的地址列表，参见readOSCCSV
+    chunk_size: 每次读取的行数
+    workers: 并行进程数，为None或1时顺序读取
+
+    Returns:
+    signals_list: 与data_paths顺序一致的列表，每项为readOSCCSV的返回值
+    """
+    tasks = [(path, addresses, chunk_size) for path in data_paths]
+
+    if workers is None or workers <= 1 or len(tasks) <= 1:
+        return [readOSCCSV(*task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_readOSCCSVArgs, tasks))
@@ -1,8 +1,309 @@
+import os
+import tracemalloc
+from functools import lru_cache
+
 import numpy as np
-from scipy import signal
+from scipy.fft import next_fast_len
+
+from filters import filter_eeg
+from running_stats import QuantileSketch
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+def _channel_moments(data: np.ndarray):
+    """各通道的一阶、二阶原点矩之和，以float64累加避免float32输入的精度损失，不分配与data同样大小的临时数组"""
+    total = np.sum(data, axis=0, dtype=np.float64)
+    total_sq = np.einsum('ij,ij->j', data, data, dtype=np.float64)
+    return total, total_sq
+
+
+def clean_eeg(data: np.ndarray, n_std: float = 5.0, method: str = 'std', sketch=None):
+    """
+    Description: 原地清理无效值和异常值：无效值(NaN/Inf)替换为0，超出阈值的值替换为该通道的中心值。
+                 所有通道一次性向量化处理，清理后的统计参数由替换前的一阶、二阶矩直接修正得到，不再重新扫描数据
+    -------------------------------
+    Parameters:
+    data: 形状为(samples, channels)的浮点数组，原地修改
+    n_std: 异常值阈值（标准差的倍数）
+    method: 阈值方法
+           - 'std': 均值±n_std个标准差，异常值替换为均值
+           - 'robust': 中位数±n_std个稳健标准差（四分位距/1.349），异常值替换为中位数，
+                       不受眨眼、咬牙等大幅伪迹本身的影响
+    sketch: 'robust'方法使用的QuantileSketch。流式处理时对每个数据块传入同一个草图，
+            草图先用该块更新，再以累积到目前为止的分位数作为阈值；为None时只使用当前数据
+
+    Returns:
+    mean: 清理后各通道的均值，形状为(channels,)
+    std: 清理后各通道的标准差，形状为(channels,)
+    diagnostics: 诊断信息字典，包含n_nan、n_inf（整个数组的无效值数量）、n_outliers（各通道的异常值数量）
+                 以及lower、upper（各通道的阈值）
+    """
+    if method not in ('std', 'robust'):
+        raise ValueError(f"不支持的异常值阈值方法: {method}")
+
+    n_samples = data.shape[0]
+
+    if method == 'robust':
+        if sketch is None:
+            sketch = QuantileSketch()
+        sketch.update(data)
+
+    finite = np.isfinite(data)
+    n_nonfinite = n_samples * data.shape[1] - int(np.count_nonzero(finite))
+    n_nan = 0
+    if n_nonfinite:
+        invalid = ~finite
+        n_nan = int(np.count_nonzero(np.isnan(data[invalid])))
+        data[invalid] = 0
+    del finite
+
+    total, total_sq = _channel_moments(data)
+    mean = total / n_samples
+    std = np.sqrt(np.maximum(total_sq / n_samples - mean ** 2, 0))
+
+    if method == 'robust':
+        center, lower, upper = sketch.robust_thresholds(n_std)
+    else:
+        center, lower, upper = mean, mean - n_std * std, mean + n_std * std
+
+    # 超出阈值的值替换为中心值，异常值通常很稀疏，只需按其坐标修正矩
+    rows, cols = np.nonzero((data < lower) | (data > upper))
+    n_outliers = np.bincount(cols, minlength=data.shape[1])
+    if len(rows):
+        values = data[rows, cols].astype(np.float64)
+        data[rows, cols] = center[cols]
+        total += np.bincount(cols, center[cols] - values, minlength=data.shape[1])
+        total_sq += np.bincount(cols, center[cols] ** 2 - values ** 2, minlength=data.shape[1])
+        mean = total / n_samples
+        std = np.sqrt(np.maximum(total_sq / n_samples - mean ** 2, 0))
+
+    diagnostics = {
+        'n_nan': n_nan,
+        'n_inf': n_nonfinite - n_nan,
+        'n_outliers': n_outliers,
+        'lower': lower,
+        'upper': upper,
+    }
+    return mean, std, diagnostics
+
+
+DETREND_CACHE_MAX_SAMPLES = 2 ** 16
+
+
+def _build_detrend_basis(n_samples: int, order: int) -> np.ndarray:
+    """长度为n_samples、阶数为order的多项式基的正交化结果Q，形状为(n_samples, order + 1)"""
+    # 时间轴缩放到[-1, 1]再构造范德蒙德矩阵，QR分解后投影即为最小二乘拟合
+    t = np.linspace(-1, 1, n_samples)
+    q, _ = np.linalg.qr(np.vander(t, order + 1))
+    q.setflags(write=False)
+    return q
+
+
+_cached_detrend_basis = lru_cache(maxsize=8)(_build_detrend_basis)
+
+
+def _detrend_basis(n_samples: int, order: int) -> np.ndarray:
+    """分段长度的基被缓存；超过DETREND_CACHE_MAX_SAMPLES的连续信号每次重新计算，不会常驻内存"""
+    if n_samples <= DETREND_CACHE_MAX_SAMPLES:
+        return _cached_detrend_basis(n_samples, order)
+    return _build_detrend_basis(n_samples, order)
+
+
+def detrend_eeg(data: np.ndarray, order: int = 3) -> np.ndarray:
+    """
+    Description: 多项式去趋势，所有通道（及所有分段）通过一次批量最小二乘投影完成
+    -------------------------------
+    Parameters:
+    data: 输入数据，形状为(samples, channels)，或(segments, samples, channels)时对每个分段分别去趋势
+    order: 多项式阶数
+
+    Returns:
+    detrended: 去趋势后的数据，形状与输入一致
+    """
+    if data.ndim not in (2, 3):
+        raise ValueError(f"输入数据应为(samples, channels)或(segments, samples, channels)，实际形状为{data.shape}")
+
+    n_samples = data.shape[-2]
+    if n_samples <= order:
+        raise ValueError(f"去趋势需要多于{order}个采样点，但只有{n_samples}个")
+
+    # 相同长度和阶数的基只计算一次，趋势为Q @ (Q.T @ x)
+    q = _detrend_basis(n_samples, order)
+    detrended = data - q @ (q.T @ data)
+    if data.dtype.kind == 'f':
+        detrended = detrended.astype(data.dtype, copy=False)
+    return detrended
 
 
-def preprocess_eeg(data: np.ndarray, methods: list = None, sample_rate: int = None):
+FFT_FULL_LENGTH_MAX = 2 ** 20
+FFT_BLOCK_SIZE = 2 ** 15
+
+
+def _normalize_filter_spec(spec) -> tuple:
+    """将滤波器定义统一为((类型, 截止频率), ...)形式的可哈希元组，单个定义和定义列表均可"""
+    if isinstance(spec, tuple) and len(spec) == 2 and isinstance(spec[0], str):
+        spec = [spec]
+
+    normalized = []
+    for filter_type, cutoff in spec:
+        if filter_type not in ('highpass', 'lowpass', 'bandpass', 'notch'):
+            raise ValueError(f"不支持的滤波器类型: {filter_type}")
+        if filter_type == 'notch' and np.ndim(cutoff) == 0:
+            # 单个陷波频率取其±1Hz
+            cutoff = (cutoff - 1, cutoff + 1)
+        cutoff = tuple(float(c) for c in np.atleast_1d(cutoff))
+        normalized.append((filter_type, cutoff))
+    return tuple(normalized)
+
+
+@lru_cache(maxsize=64)
+def _fft_mask(spec: tuple, n_fft: int, sample_rate: float) -> np.ndarray:
+    """长度为n_fft的rfft频率轴上的0/1掩码，多个滤波器的掩码相乘"""
+    freqs = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+    mask = np.ones(len(freqs), dtype=bool)
+    for filter_type, cutoff in spec:
+        if filter_type == 'highpass':
+            mask &= freqs > cutoff[0]
+        elif filter_type == 'lowpass':
+            mask &= freqs < cutoff[0]
+        elif filter_type == 'bandpass':
+            mask &= (freqs > cutoff[0]) & (freqs < cutoff[1])
+        elif filter_type == 'notch':
+            mask &= ~((freqs > cutoff[0]) & (freqs < cutoff[1]))
+    mask = mask.astype(np.float64)
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=16)
+def _fft_kernel_response(spec: tuple, numtaps: int, n_fft: int, sample_rate: float) -> np.ndarray:
+    """由频率掩码按频率采样法得到的numtaps阶对称FIR核（Hamming窗），在n_fft点rfft上的频率响应"""
+    mask = _fft_mask(spec, numtaps - 1, sample_rate)
+    kernel = np.roll(np.fft.irfft(mask, numtaps - 1), (numtaps - 1) // 2)
+    kernel = np.append(kernel, kernel[0]) * np.hamming(numtaps)
+    response = np.fft.rfft(kernel, n_fft)
+    response.setflags(write=False)
+    return response
+
+
+def fft_filter_bank(data: np.ndarray, sample_rate: float, bank: dict, block_size: int = None,
+                    numtaps: int = None) -> dict:
+    """
+    Description: 频域滤波器组。各滤波器由频率掩码设计为同一长度的加窗对称FIR核，一次正变换后对频谱
+                 分别乘以各核的频率响应得到多个输出，零相位且频率响应与信号长度无关。
+                 短信号补零到不小于线性卷积长度的快速变换长度后整段变换，首尾不会循环混叠；
+                 长信号按块进行重叠保留(overlap-save)卷积。核的频率响应按(变换长度, 滤波器)缓存
+    -------------------------------
+    Parameters:
+    data: 输入数据，形状为(samples, channels)或(samples,)
+    sample_rate: 采样率（Hz）
+    bank: 字典，键为输出名称，值为滤波器定义(类型, 截止频率)或多个定义组成的列表（掩码相乘），类型为：
+          - 'highpass': 截止频率为标量
+          - 'lowpass': 截止频率为标量
+          - 'bandpass': 截止频率为(低, 高)
+          - 'notch': 截止频率为(低, 高)，或标量工频（如50、60）时取其±1Hz
+    block_size: 分块的FFT长度；为None时，信号不超过FFT_FULL_LENGTH_MAX个采样点则整段一次变换，
+                否则按FFT_BLOCK_SIZE分块
+    numtaps: FIR核长度（奇数），默认为4秒对应的采样点数，频率分辨率约为0.25Hz
+
+    Returns:
+    outputs: 字典，键与bank一致，值为滤波后的数据，形状与输入一致
+    """
+    specs = {name: _normalize_filter_spec(spec) for name, spec in bank.items()}
+    data = np.asarray(data)
+    n_samples = data.shape[0]
+
+    if numtaps is None:
+        numtaps = int(4 * sample_rate)
+    numtaps += 1 - numtaps % 2
+
+    # 两端各补(numtaps - 1) / 2个点的镜像，使对称核的卷积为零相位
+    half = (numtaps - 1) // 2
+    pad = [(half, half)] + [(0, 0)] * (data.ndim - 1)
+    padded = np.pad(data, pad, mode='reflect' if n_samples > half else 'constant')
+    shape = (-1,) + (1,) * (data.ndim - 1)
+
+    if block_size is None and n_samples <= FFT_FULL_LENGTH_MAX:
+        # 整段信号一次正变换，各输出共享同一频谱。变换长度不小于补齐后的长度，
+        # 循环卷积只影响前numtaps - 1个输出点，取出的部分与线性卷积相同
+        n_fft = next_fast_len(len(padded), real=True)
+        spectrum = np.fft.rfft(padded, n_fft, axis=0)
+        return {name: np.fft.irfft(spectrum * _fft_kernel_response(spec, numtaps, n_fft, sample_rate).reshape(shape),
+                                   n_fft, axis=0)[numtaps - 1:numtaps - 1 + n_samples]
+                for name, spec in specs.items()}
+
+    if block_size is None:
+        block_size = FFT_BLOCK_SIZE
+    if numtaps >= block_size:
+        raise ValueError(f"FIR核长度({numtaps})必须小于分块FFT长度({block_size})")
+
+    step = block_size - numtaps + 1
+    responses = {name: _fft_kernel_response(spec, numtaps, block_size, sample_rate).reshape(shape)
+                 for name, spec in specs.items()}
+    outputs = {name: np.empty(data.shape, dtype=np.float64) for name in specs}
+
+    for start in range(0, n_samples, step):
+        stop = min(start + step, n_samples)
+        spectrum = np.fft.rfft(padded[start:start + block_size], block_size, axis=0)
+        for name, response in responses.items():
+            block = np.fft.irfft(spectrum * response, block_size, axis=0)
+            outputs[name][start:stop] = block[numtaps - 1:numtaps - 1 + stop - start]
+
+    return outputs
+
+
+STAGE_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _channel_blocks(data: np.ndarray):
+    """按通道划分数据块，使每块在时间轴上完整且临时数组不超过STAGE_BLOCK_BYTES"""
+    n_channels = data.shape[-1]
+    per_channel = max(1, data.size // n_channels) * np.dtype(np.float64).itemsize
+    step = max(1, STAGE_BLOCK_BYTES // per_channel)
+    for start in range(0, n_channels, step):
+        yield slice(start, min(start + step, n_channels))
+
+
+class _StageMemory:
+    """记录每个预处理阶段分配内存的峰值（字节），基于tracemalloc"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.peaks = {}
+        self._started = False
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def begin(self):
+        if self.enabled:
+            self._base = tracemalloc.get_traced_memory()[0]
+            # Python 3.9之前没有reset_peak，此时峰值为开始统计以来的最大值
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+    def end(self, stage: str):
+        if self.enabled:
+            self.peaks[stage] = max(self.peaks.get(stage, 0), tracemalloc.get_traced_memory()[1] - self._base)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # 出现异常时也停止由本对象启动的tracemalloc，避免之后的内存分配一直被跟踪
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+
+def preprocess_eeg(data: np.ndarray, methods: list = None, sample_rate: int = None,
+                   filter_band: tuple = (0.5, 45), notch_freq: float = None, stats=None,
+                   inplace: bool = False, out: np.ndarray = None, report_memory: bool = False,
+                   outlier_method: str = 'std', sketch=None):
     """
     Description: EEG数据预处理函数
     -------------------------------
@@ -12,12 +313,22 @@ def preprocess_eeg(data: np.ndarray, methods: list = None, sample_rate: int = No
             - 'clean': 清理无效值
             - 'normalize': Z-score标准化
             - 'filter': 带通滤波
+            - 'fft_filter': 频域带通滤波（及工频陷波），参见fft_filter_bank
             - 'detrend': 去趋势
-    sample_rate: 采样率（Hz），在使用'filter'方法时必需
+    sample_rate: 采样率（Hz），在使用'filter'或'fft_filter'方法时必需
+    filter_band: 'filter'和'fft_filter'方法的通带(高通截止频率, 低通截止频率)（Hz）
+    notch_freq: 'filter'和'fft_filter'方法的工频陷波频率（Hz），如50或60，为None时不进行陷波
+    stats: RunningStats，提供时'normalize'方法使用其中的均值和标准差作为固定参数，
+           使多个文件或数据流的各块使用一致的标准化
+    inplace: 为True时直接在data上处理，不复制输入（data须为可写、C连续的浮点数组）
+    out: 可选的输出数组，形状与data一致，data先复制到其中再原地处理
+    report_memory: 为True时统计每个阶段分配内存的峰值，保存在preprocess_params['memory']中
+    outlier_method: 异常值阈值方法，'std'或'robust'，参见clean_eeg
+    sketch: outlier_method为'robust'时使用的QuantileSketch，流式处理时在各数据块之间共享
 
     Returns:
-    processed_data: 预处理后的数据
-    preprocess_params: 预处理参数字典，包含均值和标准差等信息
+    processed_data: 预处理后的数据（inplace时为data本身，指定out时为out）
+    preprocess_params: 预处理参数字典，包含均值和标准差等信息；range为处理后各通道的(最小值, 最大值)
     """
     if methods is None:
         return data, {}
@@ -25,146 +336,390 @@ def preprocess_eeg(data: np.ndarray, methods: list = None, sample_rate: int = No
     if len(data.shape) == 0 or 0 in data.shape:
         raise ValueError("输入数据形状无效")
 
-    processed_data = data.copy()
-    original_shape = processed_data.shape
-    preprocess_params = {}
-
-    # 打印输入数据的基本信息
-    print("\n输入数据信息:")
-    print(f"数据形状: {data.shape}")
-    print(f"数据类型: {data.dtype}")
-    print(f"是否包含NaN: {np.any(np.isnan(data))}")
-    print(f"是否包含Inf: {np.any(np.isinf(data))}")
-    
-    # 如果输入是3D数据(segments, samples, channels)，转换为2D(samples, channels)
-    if len(original_shape) == 3:
-        processed_data = processed_data.reshape(-1, original_shape[-1])
-        print(f"展平后的形状: {processed_data.shape}")
-
-    # 首先进行数据清理
-    # 1. 替换无限值为0
-    processed_data[~np.isfinite(processed_data)] = 0
-    
-    # 2. 移除异常值（超过均值±5个标准差的值）
-    for ch in range(processed_data.shape[1]):
-        channel_data = processed_data[:, ch]
-        mean_val = np.mean(channel_data[np.isfinite(channel_data)])
-        std_val = np.std(channel_data[np.isfinite(channel_data)])
-        outlier_mask = np.abs(channel_data - mean_val) > 5 * std_val
-        processed_data[outlier_mask, ch] = mean_val
-
-    # 记录原始数据的统计参数（使用清理后的数据）
-    mean = np.mean(processed_data, axis=0, keepdims=True)
-    std = np.std(processed_data, axis=0, keepdims=True)
-    
-    # 确保统计参数有效
-    if np.any(np.isnan(mean)) or np.any(np.isnan(std)):
-        print("警告：统计参数包含NaN，使用替代值")
-        mean[np.isnan(mean)] = 0
-        std[np.isnan(std)] = 1
-    
-    preprocess_params['mean'] = mean.squeeze()
-    preprocess_params['std'] = std.squeeze()
-
-    print("\n预处理参数:")
-    print(f"均值: {preprocess_params['mean']}")
-    print(f"标准差: {preprocess_params['std']}")
-
+    # 先检查参数，再开始统计内存，参数无效时不会启动tracemalloc
+    if outlier_method not in ('std', 'robust'):
+        raise ValueError(f"不支持的异常值阈值方法: {outlier_method}")
     for method in methods:
-        if method == 'filter':
-            if sample_rate is None:
-                raise ValueError("使用'filter'方法时必须提供sample_rate参数")
-            
-            # 首先进行高通滤波去除基线漂移 (0.5 Hz)
-            nyquist = sample_rate / 2
-            b_high, a_high = signal.butter(4, 0.5 / nyquist, btype='high')
-            
-            # 然后进行低通滤波去除高频噪声 (45 Hz)
-            b_low, a_low = signal.butter(4, 45 / nyquist, btype='low')
-            
-            # 对每个通道分别进行滤波
-            for ch in range(processed_data.shape[1]):
-                # 先进行高通滤波
-                temp_data = signal.filtfilt(b_high, a_high, processed_data[:, ch])
-                # 再进行低通滤波
-                processed_data[:, ch] = signal.filtfilt(b_low, a_low, temp_data)
-
-        elif method == 'detrend':
-            # 去趋势
-            for ch in range(processed_data.shape[1]):
-                # 确保数据是有限值
-                channel_data = processed_data[:, ch]
-                if np.all(np.isfinite(channel_data)):
-                    # 使用多项式拟合去除趋势
-                    t = np.arange(len(channel_data))
-                    p = np.polyfit(t, channel_data, 3)  # 使用3阶多项式
-                    trend = np.polyval(p, t)
-                    processed_data[:, ch] = channel_data - trend
-
-        elif method == 'normalize':
-            # Z-score标准化
-            curr_mean = np.mean(processed_data, axis=0, keepdims=True)
-            curr_std = np.std(processed_data, axis=0, keepdims=True)
-            # 避免除以0
-            curr_std[curr_std == 0] = 1
-            processed_data = (processed_data - curr_mean) / curr_std
-
-    # 最后再次检查并清理可能产生的无效值
-    processed_data[~np.isfinite(processed_data)] = 0
-
-    # 恢复原始形状
-    if len(original_shape) == 3:
-        processed_data = processed_data.reshape(original_shape)
-
-    # 打印处理后的数据信息
-    print("\n处理后数据信息:")
-    print(f"数据范围: [{np.min(processed_data):.2f}, {np.max(processed_data):.2f}]")
-    print(f"是否包含NaN: {np.any(np.isnan(processed_data))}")
-    print(f"是否包含Inf: {np.any(np.isinf(processed_data))}")
+        if method in ('filter', 'fft_filter') and sample_rate is None:
+            raise ValueError(f"使用'{method}'方法时必须提供sample_rate参数")
+    if stats is not None and 'normalize' in methods and stats.n_channels != data.shape[-1]:
+        raise ValueError(f"stats有{stats.n_channels}个通道，但数据有{data.shape[-1]}个通道")
+
+    target = None
+    if inplace or out is not None:
+        target = data if out is None else out
+        if target.shape != data.shape:
+            raise ValueError(f"输出数组形状{target.shape}与输入数据形状{data.shape}不一致")
+        if (target.dtype.kind != 'f' or not target.flags.writeable
+                or not target.flags.c_contiguous):
+            raise ValueError("原地处理要求可写、C连续的浮点数组")
+
+    with _StageMemory(report_memory) as memory:
+        memory.begin()
+        if target is not None:
+            if out is not None and out is not data:
+                out[...] = data
+            processed_data = target
+        else:
+            # 整数输入转换为浮点数，浮点输入保持原有精度
+            processed_data = np.array(data, dtype=np.result_type(data.dtype, np.float32))
+        memory.end('copy')
+        original_shape = processed_data.shape
+        preprocess_params = {}
+
+        # 如果输入是3D数据(segments, samples, channels)，转换为2D(samples, channels)视图
+        if len(original_shape) == 3:
+            processed_data = processed_data.reshape(-1, original_shape[-1])
+
+        # 清理无效值和异常值，同时得到清理后数据的统计参数和诊断信息
+        memory.begin()
+        mean, std, diagnostics = clean_eeg(processed_data, method=outlier_method, sketch=sketch)
+        memory.end('clean')
+
+        # 打印输入数据的基本信息
+        print("\n输入数据信息:")
+        print(f"数据形状: {data.shape}")
+        print(f"数据类型: {data.dtype}")
+        print(f"是否包含NaN: {diagnostics['n_nan'] > 0}")
+        print(f"是否包含Inf: {diagnostics['n_inf'] > 0}")
+        print(f"异常值数量: {int(diagnostics['n_outliers'].sum())}")
+        if len(original_shape) == 3:
+            print(f"展平后的形状: {processed_data.shape}")
+
+        # 确保统计参数有效
+        if np.any(np.isnan(mean)) or np.any(np.isnan(std)):
+            print("警告：统计参数包含NaN，使用替代值")
+            mean[np.isnan(mean)] = 0
+            std[np.isnan(std)] = 1
+
+        preprocess_params['mean'] = mean
+        preprocess_params['std'] = std
+        preprocess_params['diagnostics'] = diagnostics
+
+        print("\n预处理参数:")
+        print(f"均值: {preprocess_params['mean']}")
+        print(f"标准差: {preprocess_params['std']}")
+
+        for method in methods:
+            memory.begin()
+
+            if method == 'filter':
+                # 高通去除基线漂移、低通去除高频噪声（及可选的工频陷波）合并为一组二阶节，
+                # 沿时间轴零相位滤波，按通道分块写回，临时数组不超过一个块
+                for block in _channel_blocks(processed_data):
+                    processed_data[:, block] = filter_eeg(processed_data[:, block], sample_rate,
+                                                          filter_band, notch_freq)
+
+            elif method == 'detrend':
+                # 去趋势：使用3阶多项式拟合，分段数据对每个分段分别去趋势
+                view = processed_data.reshape(original_shape)
+                for block in _channel_blocks(view):
+                    view[..., block] = detrend_eeg(view[..., block])
+
+            elif method == 'fft_filter':
+                # 频域滤波：通带和工频陷波的掩码相乘后只需一次正、反变换
+                spec = [('highpass', filter_band[0]), ('lowpass', filter_band[1])]
+                if notch_freq is not None:
+                    spec.append(('notch', notch_freq))
+                for block in _channel_blocks(processed_data):
+                    processed_data[:, block] = fft_filter_bank(processed_data[:, block], sample_rate,
+                                                               {'data': spec})['data']
+
+            elif method == 'normalize':
+                # Z-score标准化，提供stats时使用其中固定的均值和标准差
+                if stats is not None:
+                    curr_mean = stats.mean
+                    curr_std = stats.std
+                    preprocess_params['stats'] = stats.to_dict()
+                else:
+                    total, total_sq = _channel_moments(processed_data)
+                    curr_mean = total / processed_data.shape[0]
+                    curr_std = np.sqrt(np.maximum(total_sq / processed_data.shape[0] - curr_mean ** 2, 0))
+                # 避免除以0
+                curr_std = np.where(curr_std == 0, 1, curr_std)
+                processed_data -= curr_mean.astype(processed_data.dtype, copy=False)
+                processed_data /= curr_std.astype(processed_data.dtype, copy=False)
+
+            memory.end(method)
+
+        # 最后再次检查并清理可能产生的无效值。各通道的最小、最大值同时作为范围诊断，
+        # 二者均为有限值时该通道不含NaN/Inf，只需对其余通道逐元素检查
+        memory.begin()
+        ch_min = processed_data.min(axis=0)
+        ch_max = processed_data.max(axis=0)
+        n_invalid = 0
+        for ch in np.flatnonzero(~(np.isfinite(ch_min) & np.isfinite(ch_max))):
+            column = processed_data[:, ch]
+            invalid = ~np.isfinite(column)
+            n_invalid += int(np.count_nonzero(invalid))
+            column[invalid] = 0
+            ch_min[ch], ch_max[ch] = column.min(), column.max()
+        preprocess_params['range'] = (ch_min, ch_max)
+        memory.end('finalize')
+
+        # 恢复原始形状，原地处理时直接返回被处理的数组
+        if target is not None:
+            processed_data = target
+        elif len(original_shape) == 3:
+            processed_data = processed_data.reshape(original_shape)
+
+        # 打印处理后的数据信息
+        print("\n处理后数据信息:")
+        print(f"数据范围: [{ch_min.min():.2f}, {ch_max.max():.2f}]")
+        print(f"处理过程中产生并已替换的无效值数量: {n_invalid}")
+
+        if report_memory:
+            preprocess_params['memory'] = memory.peaks
+            print("\n各阶段内存峰值:")
+            for stage, n_bytes in memory.peaks.items():
+                print(f"{stage}: {n_bytes / 1024 ** 2:.2f} MB")
 
     return processed_data, preprocess_params
 
 
+AUGMENT_METHODS = ('shift', 'scale', 'noise')
+
+
+def augment_batch(batch: np.ndarray, methods, rng: np.random.Generator, noise_level: float = 0.1,
+                  shift_range: int = 10, scale_range: tuple = (0.8, 1.2), noise_buffer: np.ndarray = None):
+    """
+    Description: 对一批分段一次完成多种增强，每个分段的增强参数不同，所有参数一次向量化抽取
+    -------------------------------
+    Parameters:
+    batch: 分段数据，形状为(segments, samples, channels)
+    methods: 增强方法列表，可包含'shift'（时间移位）、'scale'（幅值缩放）、'noise'（高斯噪声），
+             无论顺序如何均按移位、缩放、加噪的顺序在同一个输出数组上完成
+    rng: np.random.Generator随机数生成器
+    noise_level: 噪声标准差
+    shift_range: 最大移位采样点数，每个分段的移位为[-shift_range, shift_range]内的非零整数
+    scale_range: 幅值缩放范围
+    noise_buffer: 可复用的噪声缓冲区，形状与batch一致，避免每批重新分配
+
+    Returns:
+    augmented: 增强后的数据，形状与batch一致
+    """
+    methods = [methods] if isinstance(methods, str) else list(methods)
+    for method in methods:
+        if method not in AUGMENT_METHODS:
+            raise ValueError(f"不支持的增强方法: {method}")
+
+    n_segments, n_samples = batch.shape[:2]
+    dtype = batch.dtype if batch.dtype.kind == 'f' else np.float64
+
+    if 'shift' in methods:
+        # 各分段的循环移位通过一次索引读取完成，直接生成输出数组
+        shift = rng.integers(1, shift_range, size=n_segments, endpoint=True)
+        shift *= rng.choice(np.array([-1, 1]), size=n_segments)
+        index = (np.arange(n_samples)[np.newaxis] - shift[:, np.newaxis]) % n_samples
+        augmented = np.take_along_axis(batch, index[:, :, np.newaxis], axis=1).astype(dtype, copy=False)
+    else:
+        augmented = np.array(batch, dtype=dtype)
+
+    if 'scale' in methods:
+        scale = rng.uniform(scale_range[0], scale_range[1], size=n_segments).astype(dtype)
+        augmented *= scale[:, np.newaxis, np.newaxis]
+
+    if 'noise' in methods:
+        if noise_buffer is None or noise_buffer.shape != augmented.shape or noise_buffer.dtype != dtype:
+            noise_buffer = np.empty(augmented.shape, dtype=dtype)
+        if dtype in (np.float32, np.float64):
+            rng.standard_normal(dtype=dtype, out=noise_buffer)
+        else:
+            noise_buffer[...] = rng.standard_normal(augmented.shape)
+        noise_buffer *= noise_level
+        augmented += noise_buffer
+
+    return augmented
+
+
+def augment_batches(data, methods=AUGMENT_METHODS, batch_size: int = 64, seed: int = None,
+                    worker_id: int = 0, epoch: int = 0, shuffle: bool = False, **kwargs):
+    """
+    Description: 按批次惰性产生增强后的分段
+    -------------------------------
+    Parameters:
+    data: 分段数据，形状为(segments, samples, channels)，可以是numpy数组、内存映射、EEGSegments或EEGDataset
+    methods: 增强方法列表，参见augment_batch
+    batch_size: 每批的分段数
+    seed: 随机种子，相同的(seed, worker_id, epoch)产生完全相同的增强结果
+    worker_id: 数据加载进程编号，不同进程使用互相独立的随机数流
+    epoch: 训练轮次，每轮使用不同的随机数流
+    shuffle: 是否打乱分段顺序
+    kwargs: 增强参数noise_level、shift_range、scale_range，参见augment_batch
+
+    Returns:
+    生成器，每次产生形状为(batch, samples, channels)的numpy数组
+    """
+    # 由SeedSequence派生的随机数流在不同进程和轮次之间互不相关
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(worker_id, epoch)))
+
+    order = np.arange(len(data))
+    if shuffle:
+        rng.shuffle(order)
+
+    noise_buffer = None
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        if shuffle:
+            batch = np.asarray(data[indices])
+        else:
+            batch = np.asarray(data[indices[0]:indices[-1] + 1])
+
+        # 噪声缓冲区在各批之间复用，只在批大小变化时重新分配
+        dtype = batch.dtype if batch.dtype.kind == 'f' else np.float64
+        if 'noise' in methods and (noise_buffer is None or noise_buffer.shape != batch.shape
+                                   or noise_buffer.dtype != dtype):
+            noise_buffer = np.empty(batch.shape, dtype=dtype)
+
+        yield augment_batch(batch, methods, rng, noise_buffer=noise_buffer, **kwargs)
+
+
 def augment_eeg(data: np.ndarray, method: str, **kwargs):
     """
     Description: EEG数据增强函数
     -------------------------------
     Parameters:
-    data: 输入数据，形状为(segments, samples, channels)
+    data: 输入数据，形状为(segments, samples, channels)，(samples, channels)视为单个分段
     method: 增强方法
            - 'noise': 添加高斯噪声
            - 'shift': 时间移位
            - 'scale': 幅值缩放
+    kwargs: 增强参数noise_level、shift_range、scale_range，以及可选的随机种子seed
 
     Returns:
     augmented_data: 增强后的数据
     """
-    if method == 'noise':
-        noise_level = kwargs.get('noise_level', 0.1)
-        noise = np.random.normal(0, noise_level, data.shape)
-        return data + noise
-
-    elif method == 'shift':
-        shift_range = kwargs.get('shift_range', 10)
-        shift = np.random.randint(-shift_range, shift_range)
-        return np.roll(data, shift, axis=1)
-
-    elif method == 'scale':
-        scale_range = kwargs.get('scale_range', (0.8, 1.2))
-        scale = np.random.uniform(scale_range[0], scale_range[1])
-        return data * scale
+    rng = np.random.default_rng(kwargs.pop('seed', None))
+    if data.ndim == 2:
+        return augment_batch(data[np.newaxis], method, rng, **kwargs)[0]
+    return augment_batch(data, method, rng, **kwargs)
 
 
-def save_eeg_data(data: np.ndarray, save_path: str, format: str = 'npy'):
+def save_eeg_data(data: np.ndarray, save_path: str, format: str = 'npy', **kwargs):
     """
     Description: 保存处理后的EEG数据
     -------------------------------
     Parameters:
     data: 要保存的数据
     save_path: 保存路径
-    format: 保存格式，支持'npy'和'csv'
+    format: 保存格式，支持'npy'、'csv'和'h5'（分块HDF5分段存储，参见save_eeg_segments）
+    kwargs: format为'h5'时传递给save_eeg_segments的参数，如sample_rate、ch_names、append
     """
     if format == 'npy':
         np.save(save_path, data)
     elif format == 'csv':
-        np.savetxt(save_path, data, delimiter=',')
\ No newline at end of file
+        # 分段数据按时间顺序展平为(segments * samples, channels)
+        if data.ndim == 3:
+            data = data.reshape(-1, data.shape[-1])
+        np.savetxt(save_path, data, delimiter=',')
+    elif format == 'h5':
+        save_eeg_segments(data, save_path, **kwargs)
+    else:
+        raise ValueError(f"不支持的保存格式: {format}")
+
+
+def _require_h5py():
+    if h5py is None:
+        raise ImportError("分段存储需要h5py，请先安装: pip install h5py")
+
+
+def _stored_ch_names(f) -> list:
+    """分段存储中保存的通道名称，h5py可能以bytes返回字符串属性"""
+    return [name.decode() if isinstance(name, bytes) else str(name) for name in f.attrs['ch_names']]
+
+
+def save_eeg_segments(data: np.ndarray, save_path: str, sample_rate: int = None, ch_names: list = None,
+                      append: bool = False, chunk_segments: int = 64, compression: str = 'gzip'):
+    """
+    Description: 将分段数据写入分块HDF5分段存储，每个块为一批分段，可追加写入
+    -------------------------------
+    Parameters:
+    data: 分段数据，形状为(segments, samples, channels)，(samples, channels)视为单个分段
+    save_path: 保存路径（.h5）
+    sample_rate: 采样率（Hz），作为元数据保存
+    ch_names: 通道名称列表，作为元数据保存，默认为Channel_1...Channel_n
+    append: 文件已存在时是否追加到已有分段之后，否则覆盖；追加时分段形状、sample_rate和ch_names须与已有的一致
+    chunk_segments: 每个块包含的分段数
+    compression: 压缩方式，如'gzip'、'lzf'，为None时不压缩
+
+    Returns:
+    n_segments: 写入后存储中的分段总数
+    """
+    _require_h5py()
+
+    data = np.asarray(data)
+    if data.ndim == 2:
+        data = data[np.newaxis]
+    if data.ndim != 3:
+        raise ValueError(f"分段数据应为(segments, samples, channels)，实际形状为{data.shape}")
+
+    if append and os.path.exists(save_path):
+        with h5py.File(save_path, 'a') as f:
+            segments = f['segments']
+            # 追加的数据必须与已有分段的形状、采样率和通道布局一致，未提供的元数据沿用已有的
+            if segments.shape[1:] != data.shape[1:]:
+                raise ValueError(f"追加的分段形状{data.shape[1:]}与已有分段{segments.shape[1:]}不一致")
+            stored_rate = f.attrs.get('sample_rate')
+            if sample_rate is not None and (stored_rate is None or stored_rate != sample_rate):
+                raise ValueError(f"追加的采样率{sample_rate}与已有采样率{stored_rate}不一致")
+            stored_names = _stored_ch_names(f)
+            if ch_names is not None and [str(name) for name in ch_names] != stored_names:
+                raise ValueError(f"追加的通道{list(ch_names)}与已有通道{stored_names}不一致")
+
+            start = segments.shape[0]
+            segments.resize(start + data.shape[0], axis=0)
+            segments[start:] = data
+            return segments.shape[0]
+
+    if ch_names is None:
+        ch_names = [f'Channel_{i+1}' for i in range(data.shape[-1])]
+    if len(ch_names) != data.shape[-1]:
+        raise ValueError(f"通道名称数量({len(ch_names)})与数据通道数({data.shape[-1]})不一致")
+
+    chunks = (max(1, min(chunk_segments, data.shape[0])),) + data.shape[1:]
+    with h5py.File(save_path, 'w') as f:
+        f.create_dataset('segments', data=data, maxshape=(None,) + data.shape[1:],
+                         chunks=chunks, compression=compression,
+                         shuffle=compression is not None)
+        f.attrs['ch_names'] = [str(name) for name in ch_names]
+        if sample_rate is not None:
+            f.attrs['sample_rate'] = sample_rate
+
+    return data.shape[0]
+
+
+def load_eeg_segments(save_path: str, segments=None):
+    """
+    Description: 从分块HDF5分段存储读取分段，只解压被选中分段所在的块
+    -------------------------------
+    Parameters:
+    save_path: 分段存储路径（.h5）
+    segments: 需要读取的分段（整数、切片或索引数组），为None时读取全部分段
+
+    Returns:
+    data: 形状为(segments, samples, channels)的numpy数组（segments为整数时为(samples, channels)）
+    meta: 元数据字典，包含sample_rate、ch_names和n_segments
+    """
+    _require_h5py()
+
+    with h5py.File(save_path, 'r') as f:
+        dataset = f['segments']
+        sample_rate = f.attrs.get('sample_rate')
+        meta = {
+            'sample_rate': int(sample_rate) if sample_rate is not None else None,
+            'ch_names': _stored_ch_names(f),
+            'n_segments': dataset.shape[0],
+        }
+
+        if segments is None:
+            data = dataset[()]
+        elif isinstance(segments, (int, np.integer, slice)):
+            data = dataset[segments]
+        else:
+            # h5py的花式索引要求递增且不重复，读取后再按请求的顺序排列
+            indices = np.asarray(segments, dtype=np.int64)
+            indices = np.where(indices < 0, indices + dataset.shape[0], indices)
+            unique, inverse = np.unique(indices, return_inverse=True)
+            data = dataset[unique][inverse]
+
+    return data, meta
@@ -0,0 +1,305 @@
+"""
+增量统计模块
+
+逐块累积各通道的样本数、均值和二阶中心矩(M2)，块内使用向量化计算，块之间以及不同进程的结果之间
+按Chan等人的并行合并公式合并（Welford算法的批量形式），无需将所有数据同时载入内存。
+得到的均值和标准差可作为固定的标准化参数传给preprocess_eeg，使大量记录和数据流使用一致的标准化。
+
+分位数使用按对数分桶的流式分位数草图（与DDSketch相同的分桶方式）：每个通道的桶数固定，
+内存为O(1)。分桶前减去各通道的参考中心（默认取第一个数据块的中位数），使相对精度作用于相对中心的偏差，
+原始EEG较大的直流偏置不会降低分辨率。不同块或进程的草图可以直接合并。
+
+主要类:
+- RunningStats: 各通道的增量均值/方差统计
+- QuantileSketch: 各通道的可合并流式分位数草图，用于中位数、四分位距等稳健统计
+"""
+
+import numpy as np
+
+
+class RunningStats:
+    def __init__(self, n_channels: int = None):
+        """
+        Description: 各通道的增量均值/方差统计
+        -------------------------------
+        Parameters:
+        n_channels: 通道数，为None时由第一次update的数据确定
+        """
+        self.n_channels = n_channels
+        self.count = None
+        self.mean = None
+        self.m2 = None
+        if n_channels is not None:
+            self._reset(n_channels)
+
+    def _reset(self, n_channels: int):
+        self.n_channels = n_channels
+        self.count = np.zeros(n_channels, dtype=np.int64)
+        self.mean = np.zeros(n_channels, dtype=np.float64)
+        self.m2 = np.zeros(n_channels, dtype=np.float64)
+
+    def _merge(self, count, mean, m2):
+        """按并行合并公式将另一组(count, mean, m2)合并到当前统计"""
+        total = self.count + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - self.mean
+            weight = np.where(total > 0, count / np.maximum(total, 1), 0)
+            self.mean = self.mean + delta * weight
+            self.m2 = self.m2 + m2 + delta ** 2 * self.count * weight
+        self.count = total
+
+    def update(self, data: np.ndarray):
+        """
+        Description: 用一个数据块更新统计，非有限值(NaN/Inf)不计入
+        -------------------------------
+        Parameters:
+        data: 数据块，形状为(samples, channels)或(segments, samples, channels)
+
+        Returns:
+        self
+        """
+        data = np.asarray(data)
+        data = data.reshape(-1, data.shape[-1])
+        if self.n_channels is None:
+            self._reset(data.shape[1])
+        elif data.shape[1] != self.n_channels:
+            raise ValueError(f"数据块有{data.shape[1]}个通道，但统计为{self.n_channels}个通道")
+
+        finite = np.isfinite(data)
+        if finite.all():
+            count = np.full(self.n_channels, data.shape[0], dtype=np.int64)
+            mean = data.mean(axis=0, dtype=np.float64)
+            m2 = np.sum((data - mean) ** 2, axis=0)
+        else:
+            count = finite.sum(axis=0)
+            values = np.where(finite, data, 0)
+            mean = values.sum(axis=0, dtype=np.float64) / np.maximum(count, 1)
+            m2 = np.sum(np.where(finite, values - mean, 0) ** 2, axis=0)
+
+        self._merge(count, mean, m2)
+        return self
+
+    def merge(self, other: 'RunningStats'):
+        """
+        Description: 合并另一个统计（例如其他工作进程的结果）
+        -------------------------------
+        Parameters:
+        other: 另一个RunningStats
+
+        Returns:
+        self
+        """
+        if other.n_channels is None:
+            return self
+        if self.n_channels is None:
+            self._reset(other.n_channels)
+        elif other.n_channels != self.n_channels:
+            raise ValueError(f"无法合并{other.n_channels}个通道和{self.n_channels}个通道的统计")
+
+        self._merge(other.count, other.mean, other.m2)
+        return self
+
+    @classmethod
+    def combine(cls, stats_list: list) -> 'RunningStats':
+        """合并多个统计，返回新的RunningStats"""
+        combined = cls()
+        for stats in stats_list:
+            combined.merge(stats)
+        return combined
+
+    @property
+    def var(self) -> np.ndarray:
+        """各通道的总体方差"""
+        return self.m2 / np.maximum(self.count, 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        """各通道的总体标准差"""
+        return np.sqrt(self.var)
+
+    def to_dict(self) -> dict:
+        """
+        Description: 转换为只包含numpy数组的字典，可与preprocess_params一起保存
+        -------------------------------
+        Returns:
+        state: 包含count、mean、m2的字典
+        """
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'RunningStats':
+        """由to_dict的结果恢复统计"""
+        stats = cls(len(state['mean']))
+        stats.count = np.asarray(state['count'], dtype=np.int64).copy()
+        stats.mean = np.asarray(state['mean'], dtype=np.float64).copy()
+        stats.m2 = np.asarray(state['m2'], dtype=np.float64).copy()
+        return stats
+
+
+class QuantileSketch:
+    def __init__(self, n_channels: int = None, relative_accuracy: float = 0.01,
+                 min_value: float = 1e-6, max_value: float = 1e9, center=None):
+        """
+        Description: 各通道的可合并流式分位数草图。各值减去参考中心后，绝对值按log_gamma(|x|)分桶，
+                     正值、负值各一组桶，绝对值小于min_value的值计入零桶，超出max_value的值计入最外侧的桶
+        -------------------------------
+        Parameters:
+        n_channels: 通道数，为None时由第一次update的数据确定
+        relative_accuracy: 相对中心的偏差的相对精度
+        min_value: 可区分的最小绝对偏差
+        max_value: 可区分的最大绝对偏差
+        center: 各通道的参考中心，为None时取第一个数据块的中位数
+        """
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(gamma)
+        self._offset = int(np.floor(np.log(min_value) / self._log_gamma))
+        self.n_bins = int(np.ceil(np.log(max_value) / self._log_gamma)) - self._offset + 1
+
+        # 桶k覆盖(gamma^(k-1), gamma^k]，取使相对误差最小的代表值；顺序为负值（从大到小）、零、正值
+        magnitudes = 2 * gamma ** (np.arange(self.n_bins) + self._offset) / (gamma + 1)
+        self._values = np.concatenate([-magnitudes[::-1], [0.0], magnitudes])
+
+        self.n_channels = None
+        self.counts = None
+        self.center = None if center is None else np.asarray(center, dtype=np.float64)
+        if n_channels is not None:
+            self._reset(n_channels)
+
+    def _reset(self, n_channels: int):
+        self.n_channels = n_channels
+        self.counts = np.zeros((n_channels, 2 * self.n_bins + 1), dtype=np.int64)
+
+    def _positions(self, deviations: np.ndarray) -> np.ndarray:
+        """相对中心的偏差（最后一维为通道）在展平的计数矩阵中的位置，非有限值的位置为-1"""
+        magnitude = np.abs(deviations)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bins = np.ceil(np.log(magnitude) / self._log_gamma) - self._offset
+        bins = np.clip(np.nan_to_num(bins, nan=0, posinf=0, neginf=0), 0, self.n_bins - 1).astype(np.int64)
+
+        positions = np.where(deviations < 0, self.n_bins - 1 - bins, self.n_bins + 1 + bins)
+        positions[magnitude < self.min_value] = self.n_bins
+        positions += np.arange(self.n_channels) * self.counts.shape[1]
+        positions[~np.isfinite(magnitude)] = -1
+        return positions
+
+    def update(self, data: np.ndarray):
+        """
+        Description: 用一个数据块更新草图，非有限值(NaN/Inf)不计入
+        -------------------------------
+        Parameters:
+        data: 数据块，形状为(samples, channels)或(segments, samples, channels)
+
+        Returns:
+        self
+        """
+        data = np.asarray(data)
+        data = data.reshape(-1, data.shape[-1])
+        if self.n_channels is None:
+            self._reset(data.shape[1])
+        elif data.shape[1] != self.n_channels:
+            raise ValueError(f"数据块有{data.shape[1]}个通道，但草图为{self.n_channels}个通道")
+
+        if self.center is None:
+            with np.errstate(invalid='ignore'):
+                center = np.nanmedian(np.where(np.isfinite(data), data, np.nan), axis=0)
+            self.center = np.nan_to_num(center, nan=0.0)
+
+        # 所有通道的桶编号统一为计数矩阵展平后的位置，一次bincount完成计数
+        positions = self._positions(data - self.center)
+        self.counts += np.bincount(positions[positions >= 0],
+                                   minlength=self.counts.size).reshape(self.counts.shape)
+        return self
+
+    def merge(self, other: 'QuantileSketch'):
+        """
+        Description: 合并另一个草图（例如其他数据块或工作进程的结果），两者的精度参数必须相同；
+                     参考中心不同时按桶的代表值重新分桶，误差不超过桶宽
+        -------------------------------
+        Parameters:
+        other: 另一个QuantileSketch
+
+        Returns:
+        self
+        """
+        if (other.relative_accuracy, other.min_value, other.max_value) != \
+                (self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("只能合并精度参数相同的分位数草图")
+        if other.n_channels is None:
+            return self
+        if self.n_channels is None:
+            self._reset(other.n_channels)
+            self.center = other.center.copy()
+        elif other.n_channels != self.n_channels:
+            raise ValueError(f"无法合并{other.n_channels}个通道和{self.n_channels}个通道的草图")
+
+        if np.array_equal(other.center, self.center):
+            self.counts += other.counts
+        else:
+            # 参考中心不同时，将另一个草图各桶的代表值换算到当前中心后重新分桶
+            deviations = (other._values[:, np.newaxis] + (other.center - self.center)).T
+            positions = self._positions(deviations.T).T
+            self.counts += np.bincount(positions.ravel(), weights=other.counts.ravel(),
+                                       minlength=self.counts.size).astype(np.int64).reshape(self.counts.shape)
+        return self
+
+    @property
+    def count(self) -> np.ndarray:
+        """各通道计入的样本数"""
+        return self.counts.sum(axis=1)
+
+    def quantile(self, q) -> np.ndarray:
+        """
+        Description: 计算各通道的分位数
+        -------------------------------
+        Parameters:
+        q: 分位数，取值[0, 1]，标量或数组
+
+        Returns:
+        values: q为标量时形状为(channels,)，否则为(len(q), channels)
+        """
+        q = np.asarray(q, dtype=np.float64)
+        cumulative = np.cumsum(self.counts, axis=1)
+        ranks = np.atleast_1d(q)[:, np.newaxis] * (cumulative[:, -1] - 1)
+        index = np.argmax(cumulative[np.newaxis] > ranks[:, :, np.newaxis], axis=2)
+        values = self._values[index] + self.center
+        values[:, cumulative[:, -1] == 0] = np.nan
+        return values[0] if q.ndim == 0 else values
+
+    def robust_thresholds(self, n_std: float = 5.0):
+        """
+        Description: 基于中位数和四分位距的稳健异常值阈值，IQR / 1.349为正态分布下标准差的稳健估计
+        -------------------------------
+        Parameters:
+        n_std: 阈值（稳健标准差的倍数）
+
+        Returns:
+        center: 各通道的中位数
+        lower: 各通道的下阈值
+        upper: 各通道的上阈值
+        """
+        q25, center, q75 = self.quantile([0.25, 0.5, 0.75])
+        scale = (q75 - q25) / 1.349
+        return center, center - n_std * scale, center + n_std * scale
+
+    def to_dict(self) -> dict:
+        """转换为只包含numpy数组和数值的字典，可与preprocess_params一起保存"""
+        return {
+            'counts': self.counts,
+            'center': self.center,
+            'relative_accuracy': self.relative_accuracy,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'QuantileSketch':
+        """由to_dict的结果恢复草图"""
+        counts = np.asarray(state['counts'], dtype=np.int64)
+        sketch = cls(counts.shape[0], float(state['relative_accuracy']),
+                     float(state['min_value']), float(state['max_value']), state['center'])
+        sketch.counts = counts.copy()
+        return sketch
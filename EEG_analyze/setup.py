@@ -24,6 +24,9 @@ setup(
         "matplotlib>=3.4.0",
         "mne>=1.0.0",
     ],
+    extras_require={
+        "hdf5": ["h5py>=3.1.0"],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Science/Research",
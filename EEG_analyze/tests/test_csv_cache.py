@@ -0,0 +1,75 @@
+"""
+测试CSV二进制缓存模块
+"""
+import os
+import shutil
+import time
+import numpy as np
+from eeg_analyze.csv_cache import CSVCache, parse_size
+from eeg_analyze.data_loader import loadEEGCSV
+
+
+class TestCSVCache:
+    @classmethod
+    def setup_class(cls):
+        """测试开始前的设置"""
+        cls.cache_dir = 'test_cache'
+        cls.test_file = 'test_data.csv'
+        cls.data = np.random.randn(2500, 4)
+        np.savetxt(cls.test_file, cls.data, delimiter=',', header='a,b,c,d', comments='')
+
+    @classmethod
+    def teardown_class(cls):
+        """测试结束后的清理"""
+        if os.path.exists(cls.cache_dir):
+            shutil.rmtree(cls.cache_dir)
+        if os.path.exists(cls.test_file):
+            os.remove(cls.test_file)
+
+    def test_load_from_cache(self):
+        """测试首次加载写入缓存，再次加载使用内存映射"""
+        cache = CSVCache(self.cache_dir)
+        cache.clear()
+
+        first = loadEEGCSV(self.test_file, window=2.0, frame=1.0, sample_rate=250,
+                           channels=4, cache=cache)
+        assert len(cache.entries()) == 1
+
+        data, columns = cache.load(self.test_file)
+        assert isinstance(data, np.memmap)
+        assert columns == ['a', 'b', 'c', 'd']
+
+        second = loadEEGCSV(self.test_file, window=2.0, frame=1.0, sample_rate=250,
+                            channels=4, cache=cache)
+        assert np.array_equal(first, second)
+        assert np.allclose(second[0], self.data[:500])
+
+    def test_invalidated_by_params(self):
+        """测试加载参数不同时不命中缓存"""
+        cache = CSVCache(self.cache_dir)
+        cache.store(self.test_file, self.data, ['a', 'b', 'c', 'd'])
+
+        assert cache.load(self.test_file)[0] is not None
+        assert cache.load(self.test_file, dtype='float32')[0] is None
+
+    def test_lru_prune(self):
+        """测试按最近最少使用顺序淘汰"""
+        cache = CSVCache(self.cache_dir)
+        cache.clear()
+
+        cache.store(self.test_file, self.data, ['a', 'b', 'c', 'd'], variant=1)
+        time.sleep(0.01)
+        cache.store(self.test_file, self.data, ['a', 'b', 'c', 'd'], variant=2)
+        time.sleep(0.01)
+        cache.load(self.test_file, variant=1)  # 访问后variant=1成为最近使用的条目
+
+        removed = cache.prune(cache.size() - 1)
+        assert removed == 1
+        assert cache.load(self.test_file, variant=1)[0] is not None
+        assert cache.load(self.test_file, variant=2)[0] is None
+
+    def test_parse_size(self):
+        """测试容量字符串解析"""
+        assert parse_size('1024') == 1024
+        assert parse_size('500M') == 500 * 1024 ** 2
+        assert parse_size('2GB') == 2 * 1024 ** 3
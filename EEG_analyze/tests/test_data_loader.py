@@ -4,7 +4,10 @@
 import os
 import numpy as np
 import pytest
-from eeg_analyze.data_loader import loadEEGData, loadEEGCSV, loadEEGNPY, loadEEGEDF
+import mne
+from scipy import signal
+from eeg_analyze.data_loader import loadEEGData, loadEEGCSV, loadEEGNPY, loadEEGEDF, segmentEEG, \
+    EEGSegments, streamSegments, _iterEDFBlocks, _pickEDFChannels
 
 def test_load_npy():
     # 生成测试数据
@@ -58,4 +61,173 @@ def test_window_too_large():
             )
     finally:
         if os.path.exists(test_file):
-            os.remove(test_file) 
\ No newline at end of file
+            os.remove(test_file)
+
+
+def test_segment_view():
+    # 生成测试数据
+    data = np.random.randn(2500, 4)
+
+    # 默认返回共享内存的只读视图
+    view = segmentEEG(data, window=2.0, frame=1.0, sample_rate=250)
+    assert view.shape == (9, 500, 4)
+    assert np.shares_memory(view, data)
+    assert not view.flags.writeable
+    assert np.array_equal(view[3], data[750:1250])
+
+    # 显式要求复制时返回独立的可写数组
+    copied = segmentEEG(data, window=2.0, frame=1.0, sample_rate=250, copy=True)
+    assert not np.shares_memory(copied, data)
+    assert copied.flags.writeable
+    assert np.array_equal(copied, view)
+
+
+def test_load_npy_mmap():
+    # 生成(channels, samples)排列的测试数据，加载时需要转置
+    data = np.random.randn(4, 2500)
+    test_file = 'test_data.npy'
+    np.save(test_file, data)
+
+    try:
+        segments = loadEEGNPY(
+            data_path=test_file,
+            window=2.0,
+            frame=1.0,
+            sample_rate=250,
+            mmap_mode='r'
+        )
+
+        assert isinstance(segments, EEGSegments)
+        assert isinstance(segments.data, np.memmap)
+        assert segments.shape == (9, 500, 4)
+        assert len(segments) == 9
+
+        # 按需读取的分段与转置后的原始数据一致
+        assert np.array_equal(segments[2], data.T[500:1000])
+        assert segments[[0, 8]].shape == (2, 500, 4)
+        batches = list(segments.batches(4))
+        assert [len(b) for b in batches] == [4, 4, 1]
+        assert np.array_equal(np.concatenate(batches), np.asarray(segments))
+
+        del segments, batches
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+
+def test_stream_segments():
+    # 生成测试数据
+    data = np.random.randn(2500, 4)
+    expected = segmentEEG(data, window=2.0, frame=1.0, sample_rate=250)
+
+    # 以与窗口不对齐的块大小送入，验证跨块边界的重叠
+    chunks = (data[i:i + 333] for i in range(0, data.shape[0], 333))
+    batches = list(streamSegments(chunks, window=2.0, frame=1.0, sample_rate=250, batch_size=4))
+
+    assert [b.shape[0] for b in batches] == [4, 4, 1]
+    assert np.array_equal(np.concatenate(batches), expected)
+
+    # 窗移大于窗长时，需要跳过的采样点可能跨越块边界
+    for n_samples, chunk_size in [(1000, 600), (5000, 333), (5000, 100)]:
+        data = np.random.randn(n_samples, 3)
+        expected = segmentEEG(data, window=2.0, frame=3.0, sample_rate=250)
+        chunks = (data[i:i + chunk_size] for i in range(0, n_samples, chunk_size))
+        batches = list(streamSegments(chunks, window=2.0, frame=3.0, sample_rate=250, batch_size=1))
+        assert np.array_equal(np.concatenate(batches), expected)
+
+
+def test_stream_csv():
+    data = np.random.randn(2500, 4)
+    test_file = 'test_data.csv'
+    np.savetxt(test_file, data, delimiter=',', header='a,b,c,d', comments='')
+
+    try:
+        batches = loadEEGData(
+            data_path=test_file,
+            window=2.0,
+            frame=1.0,
+            sample_rate=250,
+            channels=4,
+            stream=True,
+            batch_size=2
+        )
+        segments = np.concatenate(list(batches))
+        assert segments.shape == (9, 500, 4)
+        assert np.allclose(segments[-1], data[2000:2500])
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+
+def test_load_csv_usecols():
+    # 生成带时间戳列和辅助列的测试数据
+    data = np.random.randn(2500, 4)
+    test_file = 'test_data.csv'
+    with open(test_file, 'w') as f:
+        f.write('timestamp,TP9,AF7,AF8,TP10,aux\n')
+        for i, row in enumerate(data):
+            f.write(f'2025-01-16 10:22:27.{i:03d},' + ','.join(map(str, row)) + ',0\n')
+
+    try:
+        # 按名称选择列，并转换为float32
+        loaded_data = loadEEGCSV(
+            data_path=test_file,
+            window=2.0,
+            frame=1.0,
+            sample_rate=250,
+            usecols=['AF8', 'TP9'],
+            dtype=np.float32,
+            cache=False
+        )
+        assert loaded_data.shape == (9, 500, 2)
+        assert loaded_data.dtype == np.float32
+        assert np.allclose(loaded_data[0], data[:500, [2, 0]], atol=1e-5)
+
+        # 按索引选择列
+        loaded_data = loadEEGData(
+            data_path=test_file,
+            window=2.0,
+            frame=1.0,
+            sample_rate=250,
+            channels=4,
+            usecols=[1, 2, 3, 4],
+            cache=False
+        )
+        assert loaded_data.shape == (9, 500, 4)
+        assert np.allclose(loaded_data[0], data[:500])
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+
+def test_edf_blocks_polyphase():
+    # 用RawArray模拟500Hz的EDF记录，重采样到256Hz
+    data = np.random.randn(4, 500 * 30)
+    raw = mne.io.RawArray(data, mne.create_info(4, 500.0, 'eeg'), verbose=False)
+    expected = signal.resample_poly(data.T, 64, 125, axis=0)
+
+    # 逐块重采样的结果与整段重采样一致
+    blocks = list(_iterEDFBlocks(raw, 256, block_samples=1000))
+    assert len(blocks) > 1
+    assert np.allclose(np.concatenate(blocks), expected)
+
+    # 只读取部分时间范围
+    excerpt = np.concatenate(list(_iterEDFBlocks(raw, 256, start=1234, stop=8000, block_samples=1000)))
+    assert np.allclose(excerpt, expected[-(-1234 * 64 // 125):-(-8000 * 64 // 125)])
+
+
+def test_pick_edf_channels_order():
+    data = np.random.randn(4, 1000)
+    info = mne.create_info(['Fp1', 'Fp2', 'O1', 'O2'], 250.0, 'eeg')
+
+    # 按给定顺序选择，而不是文件中的顺序
+    raw = _pickEDFChannels(mne.io.RawArray(data, info, verbose=False), ['O2', 'Fp1'])
+    assert raw.ch_names == ['O2', 'Fp1']
+    assert np.allclose(raw.get_data(), data[[3, 0]])
+
+    raw = _pickEDFChannels(mne.io.RawArray(data, info, verbose=False), [2, 'Fp2'])
+    assert raw.ch_names == ['O1', 'Fp2']
+
+    with pytest.raises(ValueError):
+        _pickEDFChannels(mne.io.RawArray(data, info, verbose=False), ['Cz'])
+
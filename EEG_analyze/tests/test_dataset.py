@@ -0,0 +1,66 @@
+"""
+测试数据集目录模块
+"""
+import os
+import shutil
+import numpy as np
+from eeg_analyze.dataset import EEGDataset
+from eeg_analyze.data_loader import segmentEEG
+
+
+class TestDataset:
+    @classmethod
+    def setup_class(cls):
+        """测试开始前的设置"""
+        cls.data_dir = 'test_dataset_data'
+        cls.root = 'test_dataset'
+        os.makedirs(cls.data_dir, exist_ok=True)
+
+        # 生成三个长度不同的记录
+        cls.recordings = [np.random.randn(n, 4) for n in (2500, 1500, 3000)]
+        for i, data in enumerate(cls.recordings):
+            np.save(os.path.join(cls.data_dir, f'rec_{i}.npy'), data)
+
+        cls.dataset = EEGDataset.build(cls.data_dir, cls.root, window=2.0, frame=1.0, sample_rate=250)
+
+    @classmethod
+    def teardown_class(cls):
+        """测试结束后的清理"""
+        for path in (cls.data_dir, cls.root):
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+    def test_index(self):
+        """测试索引内容"""
+        assert len(self.dataset) == 9 + 5 + 11
+        assert [r['n_segments'] for r in self.dataset.recordings] == [9, 5, 11]
+        assert [r['segment_offset'] for r in self.dataset.recordings] == [0, 9, 14]
+
+        # 重新打开持久化的索引
+        reopened = EEGDataset(self.root)
+        assert len(reopened) == len(self.dataset)
+        assert reopened.recordings == self.dataset.recordings
+
+    def test_random_access(self):
+        """测试跨记录的随机访问"""
+        expected = [segmentEEG(data, 2.0, 1.0, 250) for data in self.recordings]
+
+        assert self.dataset.locate(10) == (1, 1)
+        assert np.array_equal(self.dataset[10], expected[1][1])
+        assert np.array_equal(self.dataset.segment(2, 3), expected[2][3])
+
+        batch = self.dataset.get_batch([24, 0, 12])
+        assert batch.shape == (3, 500, 4)
+        assert np.array_equal(batch[0], expected[2][10])
+        assert np.array_equal(batch[1], expected[0][0])
+        assert np.array_equal(batch[2], expected[1][3])
+
+    def test_shuffled_batches(self):
+        """测试打乱顺序的批量遍历"""
+        batches = list(self.dataset.batches(batch_size=8, shuffle=True, seed=0))
+        assert [len(b) for b in batches] == [8, 8, 8, 1]
+
+        all_segments = np.concatenate(batches)
+        assert all_segments.shape == (len(self.dataset), 500, 4)
+        # 打乱后仍覆盖所有分段
+        assert np.isclose(all_segments.sum(), self.dataset[:].sum())
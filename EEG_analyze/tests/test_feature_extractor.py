@@ -2,7 +2,10 @@
 测试特征提取模块
 """
 import numpy as np
-from eeg_analyze.feature_extractor import extract_features, spectral_analysis
+import pytest
+from scipy import signal as sp_signal
+from scipy import stats
+from eeg_analyze.feature_extractor import extract_features, spectral_analysis, welch_psd, band_power_features, EEG_BANDS, time_domain_features, hjorth_parameters, FeatureSet, SlidingFeatureSet, sliding_window_features
 
 def test_spectral_analysis():
     """测试频谱分析"""
@@ -31,6 +34,29 @@ def test_spectral_analysis():
     peak_freqs = freqs[np.argmax(psd, axis=1)]
     assert any(np.abs(peak_freqs - 10) < 1)  # 10 Hz 附近有峰值
 
+def test_welch_psd():
+    """测试批量Welch功率谱"""
+    data = np.random.randn(6, 1000, 3)
+
+    # 与逐分段、逐通道调用signal.welch的结果一致
+    freqs, psd = welch_psd(data, 250)
+    assert psd.shape == (6, 3, len(freqs))
+    for i in range(data.shape[0]):
+        for ch in range(data.shape[2]):
+            f, p = sp_signal.welch(data[i, :, ch], fs=250, nperseg=256)
+            assert np.allclose(freqs, f)
+            assert np.allclose(psd[i, ch], p)
+
+    # 奇数窗长以及分段数据的平均功率谱
+    freqs, psd = welch_psd(data[0, :301], 250, nperseg=301)
+    f, p = sp_signal.welch(data[0, :301], fs=250, nperseg=301, axis=0)
+    assert np.allclose(psd, p.T)
+
+    freqs, psd = spectral_analysis(data, 250)
+    assert psd.shape == (3, len(freqs))
+    assert np.allclose(psd, welch_psd(data, 250)[1].mean(axis=0))
+    assert spectral_analysis(data, 250, average=False)[1].shape == (6, 3, len(freqs))
+
 def test_extract_features():
     """测试特征提取"""
     # 生成测试数据
@@ -76,4 +102,111 @@ def test_extract_features():
     assert not np.any(np.isinf(features['mean']))
     assert np.all(features['std'] >= 0)
     assert np.all(features['energy'] >= 0)
-    assert np.all(features['spectral_entropy'] >= 0) 
\ No newline at end of file
+    assert np.all(features['spectral_entropy'] >= 0) 
+
+def test_band_power_features():
+    """测试频段能量特征"""
+    data = np.random.randn(4, 1000, 3)
+    freqs, psd = welch_psd(data, 250)
+
+    features = band_power_features(freqs, psd)
+    assert features['band_power'].shape == (4, 3, len(EEG_BANDS))
+
+    # 与逐分段、逐通道的计算结果一致
+    for i in range(data.shape[0]):
+        for ch in range(data.shape[2]):
+            p = psd[i, ch]
+            alpha = np.sum(p[(freqs >= 8) & (freqs <= 13)])
+            assert np.isclose(features['alpha'][i, ch], alpha)
+            assert np.isclose(features['band_power'][i, ch, 2], alpha / np.sum(p))
+            cumsum = np.cumsum(p)
+            assert features['median_frequency'][i, ch] == freqs[np.where(cumsum >= cumsum[-1] / 2)[0][0]]
+            assert np.isclose(features['mean_frequency'][i, ch], np.sum(freqs * p) / np.sum(p))
+
+    # 自定义频段
+    bands = {'smr': (12, 15), 'low_alpha': (8, 10), 'high_alpha': (10, 13)}
+    features = extract_features(data, 250, bands=bands)
+    assert features['smr'].shape == (4, 3)
+    assert features['band_power'].shape == (4, 3, 3)
+    assert 'delta' not in features
+
+def test_time_domain_features():
+    """测试批量时域特征和Hjorth参数"""
+    data = np.random.randn(5, 500, 3) * 10 + 50
+    features = time_domain_features(data)
+
+    assert np.allclose(features['var'], np.var(data, axis=1))
+    assert np.allclose(features['skewness'], stats.skew(data, axis=1))
+    assert np.allclose(features['kurtosis'], stats.kurtosis(data, axis=1))
+    assert np.allclose(features['energy'], np.sum(data ** 2, axis=1))
+    assert np.allclose(features['ptp'], np.ptp(data, axis=1))
+
+    # 与逐通道计算的Hjorth参数一致
+    for i in range(data.shape[0]):
+        for ch in range(data.shape[2]):
+            x = data[i, :, ch]
+            dx = np.diff(x)
+            ddx = np.diff(dx)
+            mobility = np.sqrt(np.var(dx) / np.var(x))
+            complexity = np.sqrt(np.var(ddx) / np.var(dx)) / mobility
+            assert np.allclose(features['hjorth'][i, ch], [np.var(x), mobility, complexity])
+
+    activity, mobility, complexity = hjorth_parameters(data[0, :, 0])
+    assert np.ndim(activity) == 0
+    assert np.isclose(mobility, features['hjorth'][0, 0, 1])
+
+def test_feature_set():
+    """测试按需计算的特征集合"""
+    data = np.random.randn(4, 500, 3)
+    all_features = extract_features(data, 250)
+
+    # 只计算请求的特征及其依赖
+    features = FeatureSet(data, 250)
+    assert np.allclose(features['alpha'], all_features['alpha'])
+    assert set(features._nodes) == {'psd', 'total_power', 'band_energy'}
+    assert np.allclose(features['std'], all_features['std'])
+    assert 'shape' not in features._nodes and 'hjorth' not in features._nodes
+
+    selected = extract_features(data, 250, features=['alpha', 'beta', 'theta', 'mean', 'std'])
+    assert list(selected) == ['alpha', 'beta', 'theta', 'mean', 'std']
+
+    # 作为只读字典使用时与extract_features的结果一致
+    assert set(features) == set(all_features)
+    assert 'foo' not in features
+    for name, value in features.items():
+        assert np.allclose(value, all_features[name])
+
+def test_sliding_window_features():
+    """测试滑动窗口的增量特征"""
+    sample_rate = 256
+    signal = np.random.randn(60 * sample_rate, 3) * 10 + np.linspace(0, 100, 60 * sample_rate)[:, None]
+
+    def windows(hop):
+        return np.lib.stride_tricks.sliding_window_view(signal, 2 * sample_rate, axis=0)[::hop].transpose(0, 2, 1)
+
+    # 窗移为Welch帧移的整数倍时与对分段调用extract_features的结果一致
+    features = sliding_window_features(signal, sample_rate, 2.0, 0.5)
+    expected = extract_features(windows(128), sample_rate)
+    assert set(features) == set(expected)
+    for name in expected:
+        assert np.allclose(features[name], expected[name]), name
+
+    # 窗移不是Welch帧移的整数倍时（0.1 s）所有特征仍与extract_features一致
+    segments = windows(25)
+    features = sliding_window_features(signal, sample_rate, 2.0, 0.1)
+    expected = extract_features(segments, sample_rate)
+    for name in expected:
+        assert np.allclose(features[name], expected[name]), name
+
+    # 窗移为帧移的整数倍时各帧可在窗口间共享（如帧移64个采样点）
+    features = sliding_window_features(signal, sample_rate, 2.0, 0.25, features=['alpha', 'band_power'])
+    expected = extract_features(windows(64), sample_rate, features=['alpha', 'band_power'])
+    for name in expected:
+        assert np.allclose(features[name], expected[name]), name
+
+    # 指定psd_step时功率谱为帧移等于psd_step的Welch估计
+    features = SlidingFeatureSet(signal, sample_rate, 2.0, 0.1, psd_step=25)
+    freqs, psd = sp_signal.welch(segments, fs=sample_rate, nperseg=256, noverlap=256 - 25, axis=1)
+    assert np.allclose(features.node('psd')['psd'], np.moveaxis(psd, 1, 2))
+    with pytest.raises(ValueError):
+        SlidingFeatureSet(signal, sample_rate, 2.0, 0.1, psd_step=0)
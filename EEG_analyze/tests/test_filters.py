@@ -0,0 +1,72 @@
+"""
+测试滤波器模块
+"""
+import numpy as np
+from scipy import signal
+from eeg_analyze.filters import (design_filter, design_cascade, bandpass_stages, filter_eeg,
+                                 StreamingFilter, _design_filter)
+
+
+def test_design_cache():
+    _design_filter.cache_clear()
+    sos1 = design_filter('bandpass', 4, (8, 13), 256)
+    sos2 = design_filter('bandpass', 4, [8, 13], 256)
+    assert np.array_equal(sos1, sos2)
+    assert _design_filter.cache_info().hits == 1
+
+    # 返回的是副本，修改不会影响缓存
+    sos1[:] = 0
+    assert np.any(design_filter('bandpass', 4, (8, 13), 256))
+
+    stages = bandpass_stages((0.5, 45), notch_freq=50)
+    assert [stage[0] for stage in stages] == ['highpass', 'lowpass', 'notch']
+    assert design_cascade(stages, 256).shape == (2 + 2 + 1, 6)
+
+
+def test_filter_eeg():
+    sample_rate = 256
+    t = np.arange(20 * sample_rate) / sample_rate
+    # 10Hz信号叠加0.1Hz漂移和80Hz噪声
+    data = np.stack([np.sin(2 * np.pi * 10 * t + phase) for phase in (0, 1, 2)], axis=1)
+    noisy = data + 5 * np.sin(2 * np.pi * 0.1 * t)[:, None] + np.sin(2 * np.pi * 80 * t)[:, None]
+
+    filtered = filter_eeg(noisy, sample_rate, filter_band=(0.5, 45))
+    assert filtered.shape == noisy.shape
+
+    # 与(b, a)形式的两次零相位滤波结果一致（忽略边缘的瞬态）
+    b_high, a_high = signal.butter(4, 0.5, btype='high', fs=sample_rate)
+    b_low, a_low = signal.butter(4, 45, btype='low', fs=sample_rate)
+    expected = signal.filtfilt(b_low, a_low, signal.filtfilt(b_high, a_high, noisy, axis=0), axis=0)
+    interior = slice(4 * sample_rate, -4 * sample_rate)
+    assert np.allclose(filtered[interior], expected[interior], atol=0.02)
+    assert np.allclose(filtered[interior], data[interior], atol=0.05)
+
+    # 沿其他轴滤波
+    assert np.allclose(filter_eeg(noisy.T, sample_rate, axis=1), filtered.T)
+
+
+def test_streaming_filter():
+    data = np.random.randn(5000, 4) + 800  # 带直流偏置的信号
+    expected = StreamingFilter(256, 4, notch_freq=50).process(data)
+
+    # 任意长度的分块输入，输出与一次性滤波完全一致
+    stream = StreamingFilter(256, 4, notch_freq=50)
+    chunks = np.split(data, [1, 13, 14, 500, 1024, 4999])
+    outputs = [stream.process(chunk) for chunk in chunks]
+    assert np.allclose(np.concatenate(outputs), expected)
+
+    # float32数据块不需要调用方先转换为float64
+    stream = StreamingFilter(256, 4, notch_freq=50)
+    outputs = [stream.process(chunk.astype(np.float32)) for chunk in chunks]
+    assert outputs[-1].dtype == np.float64
+    assert np.allclose(np.concatenate(outputs), StreamingFilter(256, 4, notch_freq=50).process(data.astype(np.float32)))
+
+    # 状态按首个样本初始化，不会产生直流偏置引起的启动瞬态
+    assert np.abs(expected[:10]).max() < 5
+
+    # 单个样本输入
+    stream.reset()
+    assert stream.process(data[0]).shape == (4,)
+
+    delay = stream.group_delay([10, 20])
+    assert delay.shape == (2,) and np.all(delay > 0)
@@ -0,0 +1,59 @@
+"""
+测试OSC记录文件读取模块
+"""
+import os
+import csv
+import numpy as np
+from eeg_analyze.osc_loader import readOSCCSV, readOSCFiles, isOSCCSV
+from eeg_analyze.data_loader import loadEEGData
+
+
+def _write_osc_csv(path, eeg, acc):
+    """按OSCDataReceiver._write_data的格式写出测试文件"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Timestamp', 'Address', 'Data'])
+        for i, row in enumerate(eeg):
+            timestamp = f'2025-01-16 10:22:{27 + i // 1000:02d}.{i % 1000:03d}'
+            writer.writerow([timestamp, '/8001/eeg', tuple(row.tolist())])
+            if i % 10 == 0:
+                writer.writerow([timestamp, '/8001/acc', tuple(acc[i // 10].tolist())])
+
+
+def test_read_osc_csv():
+    eeg = np.random.randn(2500, 6)
+    acc = np.random.randn(250, 3)
+    test_file = 'test_osc.csv'
+    _write_osc_csv(test_file, eeg, acc)
+
+    try:
+        assert isOSCCSV(test_file)
+
+        # 使用较小的块，验证跨块拼接
+        signals = readOSCCSV(test_file, chunk_size=700)
+        assert set(signals) == {'/8001/eeg', '/8001/acc'}
+        assert np.allclose(signals['/8001/eeg']['data'], eeg)
+        assert np.allclose(signals['/8001/acc']['data'], acc)
+
+        timestamps = signals['/8001/eeg']['timestamps']
+        assert timestamps.shape == (2500,)
+        assert np.allclose(np.diff(timestamps), 0.001, atol=1e-6)
+
+        # 按信号名过滤地址
+        signals_list = readOSCFiles([test_file, test_file], addresses=['acc'], workers=2)
+        assert [list(s) for s in signals_list] == [['/8001/acc'], ['/8001/acc']]
+
+        # 直接作为loadEEGData的输入，只取前4个EEG通道
+        segments = loadEEGData(test_file, window=2.0, frame=1.0, sample_rate=250,
+                               usecols=[0, 1, 2, 3], cache=False)
+        assert segments.shape == (9, 500, 4)
+        assert np.allclose(segments[1], eeg[250:750, :4])
+
+        # 流式加载的结果与一次性加载一致
+        batches = list(loadEEGData(test_file, window=2.0, frame=1.0, sample_rate=250,
+                                   usecols=['/8001/eeg_1', 1, 2, 3], stream=True, batch_size=4))
+        assert [b.shape[0] for b in batches] == [4, 4, 1]
+        assert np.allclose(np.concatenate(batches), segments)
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
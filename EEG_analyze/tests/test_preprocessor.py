@@ -1,8 +1,11 @@
 """
 测试预处理模块
 """
+import os
+import tracemalloc
 import numpy as np
-from eeg_analyze.preprocessor import preprocess_eeg, augment_eeg
+import pytest
+from eeg_analyze.preprocessor import preprocess_eeg, augment_eeg, augment_batches, clean_eeg, detrend_eeg, fft_filter_bank, save_eeg_segments, load_eeg_segments, DETREND_CACHE_MAX_SAMPLES, _cached_detrend_basis
 
 def test_preprocess():
     # 生成测试数据
@@ -26,6 +29,154 @@ def test_preprocess():
     assert not np.any(np.isinf(processed_data))
     assert 'mean' in params
     assert 'std' in params
+    assert np.allclose(params['range'][0], processed_data.min(axis=0))
+    assert np.allclose(params['range'][1], processed_data.max(axis=0))
+
+def test_preprocess_inplace():
+    data = np.random.randn(20, 250, 4)
+    methods = ['filter', 'detrend', 'normalize']
+    expected, _ = preprocess_eeg(data, methods, sample_rate=250)
+
+    # 原地处理
+    work = data.copy()
+    processed, params = preprocess_eeg(work, methods, sample_rate=250, inplace=True, report_memory=True)
+    assert processed is work
+    assert np.allclose(processed, expected)
+    assert set(params['memory']) == {'copy', 'clean', 'filter', 'detrend', 'normalize', 'finalize'}
+    assert params['memory']['copy'] < data.nbytes
+
+    # 写入预先分配的输出数组，输入保持不变
+    out = np.empty_like(data)
+    original = data.copy()
+    processed, _ = preprocess_eeg(data, methods, sample_rate=250, out=out)
+    assert processed is out
+    assert np.allclose(out, expected)
+    assert np.array_equal(data, original)
+
+def test_preprocess_report_memory_errors():
+    data = np.random.randn(1000, 4)
+
+    # 参数无效时不会启动内存统计
+    with pytest.raises(ValueError):
+        preprocess_eeg(data, ['filter'], report_memory=True)
+    assert not tracemalloc.is_tracing()
+
+    # 处理过程中出错时也会停止内存统计
+    with pytest.raises(ValueError):
+        preprocess_eeg(data, ['filter'], sample_rate=250, filter_band=(0.5, 200), report_memory=True)
+    assert not tracemalloc.is_tracing()
+
+def test_clean_eeg():
+    data = np.random.randn(2000, 6) * 10 + 100
+    data[10, 0] = np.nan
+    data[20, 1] = np.inf
+    data[30, 2] = 1e4
+    data[40, 3] = -1e4
+
+    # 逐通道的参考实现
+    expected = data.copy()
+    expected[~np.isfinite(expected)] = 0
+    for ch in range(expected.shape[1]):
+        mean_val = expected[:, ch].mean()
+        std_val = expected[:, ch].std()
+        expected[np.abs(expected[:, ch] - mean_val) > 5 * std_val, ch] = mean_val
+
+    cleaned = data.copy()
+    mean, std, diagnostics = clean_eeg(cleaned)
+    assert np.allclose(cleaned, expected)
+    assert np.allclose(mean, expected.mean(axis=0))
+    assert np.allclose(std, expected.std(axis=0))
+    assert diagnostics['n_nan'] == 1
+    assert diagnostics['n_inf'] == 1
+    assert diagnostics['n_outliers'][2] == 1
+    assert diagnostics['n_outliers'][3] == 1
+
+def test_detrend_eeg():
+    t = np.arange(1000)
+    data = np.random.randn(1000, 4) + (1e-6 * t ** 2 + 0.01 * t)[:, None]
+
+    # 与逐通道np.polyfit的结果一致
+    expected = np.stack([data[:, ch] - np.polyval(np.polyfit(t, data[:, ch], 3), t)
+                         for ch in range(data.shape[1])], axis=1)
+    assert np.allclose(detrend_eeg(data), expected)
+
+    # 分段数据对每个分段分别去趋势
+    segments = data[:800].reshape(4, 200, 4)
+    detrended = detrend_eeg(segments)
+    assert detrended.shape == segments.shape
+    for i in range(4):
+        assert np.allclose(detrended[i], detrend_eeg(segments[i]))
+
+    # 只缓存分段长度的基，长连续信号的基用完即释放
+    _cached_detrend_basis.cache_clear()
+    detrend_eeg(segments)
+    long_data = np.random.randn(DETREND_CACHE_MAX_SAMPLES + 1, 2)
+    long_data[:, 1] += np.linspace(0, 100, len(long_data))
+    assert np.abs(detrend_eeg(long_data)).max() < 10
+    assert _cached_detrend_basis.cache_info().currsize == 1
+
+def test_fft_filter_bank():
+    sample_rate = 256
+    t = np.arange(60 * sample_rate) / sample_rate
+    alpha = np.sin(2 * np.pi * 10 * t)
+    beta = np.sin(2 * np.pi * 20 * t + 1)
+    hum = np.sin(2 * np.pi * 50 * t)
+    data = np.stack([alpha, beta], axis=1) + hum[:, None] + 3 * np.sin(2 * np.pi * 0.2 * t)[:, None]
+
+    bank = {
+        'clean': [('highpass', 1), ('lowpass', 40), ('notch', 50)],
+        'alpha': ('bandpass', (8, 13)),
+    }
+    outputs = fft_filter_bank(data, sample_rate, bank)
+    assert set(outputs) == {'clean', 'alpha'}
+    # FIR核长4秒，忽略两端的过渡部分
+    interior = slice(4 * sample_rate, -4 * sample_rate)
+    assert np.allclose(outputs['clean'][interior], np.stack([alpha, beta], axis=1)[interior], atol=2e-3)
+    assert np.allclose(outputs['alpha'][interior, 0], alpha[interior], atol=2e-3)
+    assert np.allclose(outputs['alpha'][interior, 1], 0, atol=2e-3)
+
+    # 分块重叠保留卷积与整段变换使用同一个FIR核，结果完全一致
+    blocks = fft_filter_bank(data, sample_rate, bank, block_size=4096)
+    for name in bank:
+        assert blocks[name].shape == data.shape
+        assert np.allclose(blocks[name], outputs[name], atol=1e-9)
+
+    # 整段变换补零到线性卷积长度，信号末尾不会循环混叠到开头
+    impulse = np.zeros((20000, 1))
+    impulse[-1] = 1000
+    assert np.allclose(fft_filter_bank(impulse, sample_rate, bank)['clean'][:5000], 0, atol=1e-9)
+
+    # 作为预处理方法使用
+    processed, _ = preprocess_eeg(data, ['fft_filter'], sample_rate, filter_band=(1, 40), notch_freq=50)
+    assert np.allclose(processed, outputs['clean'], atol=1e-6)
+
+def test_clean_eeg_robust():
+    from eeg_analyze.running_stats import QuantileSketch
+
+    # 固定随机种子：阈值附近的正常采样点偶尔也会被判为异常值
+    np.random.seed(0)
+    data = np.random.randn(20000, 2)
+    # 5%的采样点为幅值很大的伪迹，会抬高标准差，使±5σ规则失效
+    data[::20] = 40
+
+    cleaned = data.copy()
+    _, _, diagnostics = clean_eeg(cleaned)
+    assert diagnostics['n_outliers'].sum() == 0
+
+    cleaned = data.copy()
+    _, std, diagnostics = clean_eeg(cleaned, method='robust')
+    assert np.all(diagnostics['n_outliers'] == 1000)
+    assert np.all(np.abs(cleaned) < 10)
+    assert np.allclose(std, 1, atol=0.1)
+
+    # 流式处理：各数据块共享同一个草图
+    sketch = QuantileSketch()
+    n_outliers = 0
+    for chunk in np.array_split(data.copy(), 10):
+        _, _, diagnostics = clean_eeg(chunk, method='robust', sketch=sketch)
+        n_outliers += diagnostics['n_outliers'].sum()
+    assert n_outliers == 2000
+    assert np.all(sketch.count == len(data))
 
 def test_augment():
     # 生成测试数据
@@ -56,4 +207,64 @@ def test_augment():
         scale_range=(0.8, 1.2)
     )
     assert scaled_data.shape == data.shape
-    assert not np.array_equal(data, scaled_data) 
\ No newline at end of file
+    assert not np.array_equal(data, scaled_data) 
+
+def test_augment_batches():
+    data = np.random.randn(100, 200, 4)
+
+    batches = list(augment_batches(data, batch_size=32, seed=0, shift_range=20))
+    assert [len(batch) for batch in batches] == [32, 32, 32, 4]
+    augmented = np.concatenate(batches)
+    assert augmented.shape == data.shape
+    # 每个分段都被增强
+    assert not np.any(np.all(np.isclose(augmented, data), axis=(1, 2)))
+
+    # 相同种子、进程编号和轮次的结果可复现，不同进程的随机数流不同
+    again = np.concatenate(list(augment_batches(data, batch_size=32, seed=0, shift_range=20)))
+    other = np.concatenate(list(augment_batches(data, batch_size=32, seed=0, worker_id=1, shift_range=20)))
+    assert np.array_equal(augmented, again)
+    assert not np.array_equal(augmented, other)
+
+    # 只做移位时，每个分段按各自的非零移位量循环移位
+    shifted = next(augment_batches(data, methods=['shift'], batch_size=100, seed=1, shift_range=5))
+    shifts = set()
+    for original, segment in zip(data, shifted):
+        matches = [k for k in range(-5, 6) if np.array_equal(np.roll(original, k, axis=0), segment)]
+        assert len(matches) == 1 and matches[0] != 0
+        shifts.add(matches[0])
+    assert len(shifts) > 1
+
+def test_segment_store():
+    data = np.random.randn(10, 500, 4).astype(np.float32)
+    more = np.random.randn(5, 500, 4).astype(np.float32)
+    test_file = 'test_segments.h5'
+
+    try:
+        assert save_eeg_segments(data, test_file, sample_rate=250, chunk_segments=4) == 10
+        # 追加写入
+        assert save_eeg_segments(more, test_file, append=True) == 15
+
+        all_data, meta = load_eeg_segments(test_file)
+        assert meta['sample_rate'] == 250
+        assert meta['ch_names'] == ['Channel_1', 'Channel_2', 'Channel_3', 'Channel_4']
+        assert meta['n_segments'] == 15
+        assert all_data.dtype == np.float32
+        assert np.array_equal(all_data, np.concatenate([data, more]))
+
+        # 部分读取，索引可以乱序和重复
+        part, _ = load_eeg_segments(test_file, [12, 3, 3, -1])
+        assert np.array_equal(part, np.stack([more[2], data[3], data[3], more[4]]))
+        part, _ = load_eeg_segments(test_file, slice(2, 6))
+        assert np.array_equal(part, data[2:6])
+
+        # 追加的分段形状、采样率或通道与已有的不一致时报错，存储保持不变
+        with pytest.raises(ValueError):
+            save_eeg_segments(more[:, :, :3], test_file, append=True)
+        with pytest.raises(ValueError):
+            save_eeg_segments(more, test_file, sample_rate=256, append=True)
+        with pytest.raises(ValueError):
+            save_eeg_segments(more, test_file, ch_names=['TP9', 'AF7', 'AF8', 'TP10'], append=True)
+        assert save_eeg_segments(more, test_file, sample_rate=250, ch_names=meta['ch_names'], append=True) == 20
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
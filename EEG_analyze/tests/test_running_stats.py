@@ -0,0 +1,73 @@
+"""
+测试增量统计模块
+"""
+import pickle
+import numpy as np
+from eeg_analyze.running_stats import RunningStats, QuantileSketch
+from eeg_analyze.preprocessor import preprocess_eeg
+
+
+def test_running_stats():
+    data = np.random.randn(10000, 4) * [1, 10, 100, 1000] + [0, -5, 50, 1e4]
+
+    # 逐块更新
+    stats = RunningStats()
+    for chunk in np.array_split(data, 37):
+        stats.update(chunk)
+    assert np.all(stats.count == 10000)
+    assert np.allclose(stats.mean, data.mean(axis=0))
+    assert np.allclose(stats.std, data.std(axis=0))
+
+    # 多个进程的结果合并，可经pickle传递
+    parts = [RunningStats().update(chunk) for chunk in np.array_split(data, 3)]
+    parts = [pickle.loads(pickle.dumps(part)) for part in parts]
+    combined = RunningStats.combine(parts)
+    assert np.allclose(combined.mean, stats.mean)
+    assert np.allclose(combined.var, stats.var)
+
+    # 序列化后恢复
+    restored = RunningStats.from_dict(stats.to_dict())
+    assert np.allclose(restored.std, stats.std)
+
+    # 非有限值不计入
+    with_nan = data.copy()
+    with_nan[5, 1] = np.nan
+    stats = RunningStats(4).update(with_nan)
+    assert stats.count[1] == 9999
+    assert np.isclose(stats.mean[1], np.nanmean(with_nan[:, 1]))
+
+
+def test_fixed_normalization():
+    stats = RunningStats()
+    chunks = [np.random.randn(500, 4) * 3 + 2 for _ in range(4)]
+    for chunk in chunks:
+        stats.update(chunk)
+
+    processed, params = preprocess_eeg(chunks[0], ['normalize'], stats=stats)
+    assert np.allclose(processed, (chunks[0] - stats.mean) / stats.std)
+    assert 'stats' in params
+
+
+def test_quantile_sketch():
+    data = np.random.randn(50000, 3) * [1, 20, 0.01] + [0, 100, -5]
+    expected = np.quantile(data, [0.1, 0.5, 0.9], axis=0)
+
+    # 分块更新与跨进程合并
+    parts = [QuantileSketch().update(chunk) for chunk in np.array_split(data, 7)]
+    sketch = QuantileSketch()
+    for part in parts:
+        sketch.merge(pickle.loads(pickle.dumps(part)))
+    assert np.all(sketch.count == 50000)
+
+    quantiles = sketch.quantile([0.1, 0.5, 0.9])
+    assert quantiles.shape == (3, 3)
+    assert np.allclose(quantiles[:, 1:], expected[:, 1:], rtol=0.02)
+    assert np.allclose(quantiles[:, 0], expected[:, 0], atol=0.02)
+    assert sketch.quantile(0.5).shape == (3,)
+
+    # 稳健阈值不受大幅伪迹影响
+    center, lower, upper = sketch.robust_thresholds(5)
+    assert np.allclose(upper - center, 5 * np.array([1, 20, 0.01]), rtol=0.05)
+
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert np.array_equal(restored.quantile(0.5), sketch.quantile(0.5))
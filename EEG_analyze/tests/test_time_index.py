@@ -0,0 +1,73 @@
+"""
+测试记录文件时间索引模块
+"""
+import os
+import csv
+import numpy as np
+from eeg_analyze.time_index import buildTimeIndex, readTimeRange, INDEX_SUFFIX
+
+
+def _append_rows(path, timestamps, data, header=None):
+    """按DataSaver的格式追加写出时间戳和数据"""
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if header is not None:
+            writer.writerow(header)
+        for timestamp, row in zip(timestamps, data):
+            writer.writerow([timestamp] + row.tolist())
+
+
+def test_time_range_numeric():
+    test_file = 'test_time_index.csv'
+    timestamps = 1700000000.0 + np.arange(2000) / 250
+    data = np.random.randn(2000, 4)
+    _append_rows(test_file, timestamps, data, header=['Timestamp', 'Fp1', 'Fp2', 'O1', 'O2'])
+
+    try:
+        index = buildTimeIndex(test_file, every=100)
+        assert os.path.exists(test_file + INDEX_SUFFIX)
+        assert index['n_rows'] == 2000
+        assert len(index['timestamps']) == 20
+
+        start, end = timestamps[333], timestamps[1234]
+        df = readTimeRange(test_file, start, end, every=100)
+        assert df.columns.tolist() == ['Timestamp', 'Fp1', 'Fp2', 'O1', 'O2']
+        assert len(df) == 1234 - 333
+        assert np.allclose(df.iloc[:, 1:].values, data[333:1234])
+
+        # 记录继续写入后，索引从上次覆盖的位置扩展
+        more_timestamps = timestamps[-1] + np.arange(1, 501) / 250
+        more_data = np.random.randn(500, 4)
+        _append_rows(test_file, more_timestamps, more_data)
+
+        index = buildTimeIndex(test_file, every=100)
+        assert index['n_rows'] == 2500
+        assert index['indexed_size'] == os.path.getsize(test_file)
+        assert len(index['timestamps']) == 25
+
+        df = readTimeRange(test_file, more_timestamps[100], None, every=100)
+        assert np.allclose(df.iloc[:, 1:].values, more_data[100:])
+    finally:
+        for path in (test_file, test_file + INDEX_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_time_range_datetime():
+    test_file = 'test_time_index_dt.csv'
+    timestamps = [f'2025-01-16 10:22:{27 + i // 1000:02d}.{i % 1000:03d}' for i in range(3000)]
+    data = np.random.randn(3000, 2)
+    _append_rows(test_file, timestamps, data, header=['Timestamp', 'A', 'B'])
+
+    try:
+        df = readTimeRange(test_file, '2025-01-16 10:22:28', '2025-01-16 10:22:29', every=128)
+        assert len(df) == 1000
+        assert np.allclose(df[['A', 'B']].values, data[1000:2000])
+
+        # 范围之外返回空表
+        df = readTimeRange(test_file, '2025-01-16 11:00:00', '2025-01-16 11:00:01', every=128)
+        assert len(df) == 0
+    finally:
+        for path in (test_file, test_file + INDEX_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
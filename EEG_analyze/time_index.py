@@ -0,0 +1,180 @@
+"""
+记录文件时间索引模块
+
+为按时间顺序写出的CSV记录（Pylsl的DataSaver、Pylsl_extract_signal以及OSCDataReceiver的输出）
+生成稀疏的时间索引：每隔若干行记录一次(时间戳, 字节偏移, 行号)，保存为数据文件旁的
+<文件名>.tidx.npz。读取某个时间范围时先在索引上二分查找，再直接定位到对应字节偏移读取，
+无需扫描整个文件。记录仍在写入时，索引会从上次覆盖的位置继续扩展。
+
+第一列必须为时间戳，可以是数值（单位：s），也可以是'2025-01-16 10:22:27.359'形式的时间字符串。
+"""
+
+import os
+import csv
+import numpy as np
+import pandas as pd
+
+
+INDEX_SUFFIX = '.tidx.npz'
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def toSeconds(values) -> np.ndarray:
+    """
+    Description: 将时间戳统一转换为以秒为单位的浮点数
+    -------------------------------
+    Parameters:
+    values: 数值时间戳（单位：s），或时间字符串/datetime，无时区的时间按UTC处理
+
+    Returns:
+    seconds: 形状与输入一致的float64数组
+    """
+    values = pd.Series(np.atleast_1d(np.asarray(values, dtype=object)))
+    numeric = pd.to_numeric(values, errors='coerce')
+    if not numeric.isna().any():
+        return numeric.to_numpy(dtype=np.float64)
+
+    times = pd.to_datetime(values).to_numpy().astype('datetime64[ns]')
+    return times.astype(np.int64) / 1e9
+
+
+def _scanCheckpoints(data_path: str, offset: int, row: int, every: int):
+    """
+    从字节偏移offset（第row行的行首）开始扫描完整的行，返回行号为every整数倍的行的行号和字节偏移，
+    以及扫描结束时的总行数和已覆盖的字节数
+    """
+    rows = []
+    offsets = []
+    line_start = offset
+    position = offset
+
+    with open(data_path, 'rb') as f:
+        f.seek(offset)
+        while True:
+            block = f.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+
+            # 每个换行符之后是下一行的行首，只统计以换行符结尾的完整行
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n')) + position + 1
+            if len(newlines):
+                starts = np.concatenate([[line_start], newlines[:-1]])
+                row_numbers = row + np.arange(len(newlines))
+                selected = row_numbers % every == 0
+                rows.append(row_numbers[selected])
+                offsets.append(starts[selected])
+
+                row += len(newlines)
+                line_start = int(newlines[-1])
+            position += len(block)
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    offsets = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int64)
+    return rows.astype(np.int64), offsets.astype(np.int64), row, line_start
+
+
+def _readCheckpointTimes(data_path: str, offsets: np.ndarray) -> np.ndarray:
+    """读取各检查点所在行的第一列时间戳"""
+    fields = []
+    with open(data_path, 'rb') as f:
+        for offset in offsets:
+            f.seek(int(offset))
+            line = f.readline().decode('utf-8', errors='ignore')
+            fields.append(next(csv.reader([line]))[0])
+    return toSeconds(fields) if fields else np.empty(0, dtype=np.float64)
+
+
+def buildTimeIndex(data_path: str, every: int = 1000):
+    """
+    Description: 为记录文件生成或扩展稀疏时间索引，并保存为<data_path>.tidx.npz
+    -------------------------------
+    Parameters:
+    data_path: CSV记录文件路径，第一行为表头，第一列为时间戳
+    every: 每隔多少行记录一个检查点
+
+    Returns:
+    index: 索引字典，包含timestamps、offsets、rows、n_rows、indexed_size、every、columns
+    """
+    index_path = data_path + INDEX_SUFFIX
+    file_size = os.path.getsize(data_path)
+
+    with open(data_path, 'rb') as f:
+        header = f.readline()
+    columns = next(csv.reader([header.decode('utf-8', errors='ignore')]))
+
+    index = None
+    if os.path.exists(index_path):
+        with np.load(index_path) as saved:
+            index = {key: saved[key] for key in saved.files}
+        # 文件被截断或重写、表头或间隔不同时重新生成
+        if (int(index['indexed_size']) > file_size or int(index['every']) != every
+                or list(index['columns']) != columns):
+            index = None
+
+    if index is None:
+        index = {
+            'timestamps': np.empty(0, dtype=np.float64),
+            'offsets': np.empty(0, dtype=np.int64),
+            'rows': np.empty(0, dtype=np.int64),
+            'n_rows': np.int64(0),
+            'indexed_size': np.int64(len(header)),
+            'every': np.int64(every),
+            'columns': np.array(columns),
+        }
+    elif int(index['indexed_size']) == file_size:
+        return index
+
+    # 从上次覆盖的位置继续扫描新写入的行
+    rows, offsets, n_rows, indexed_size = _scanCheckpoints(
+        data_path, int(index['indexed_size']), int(index['n_rows']), every)
+    timestamps = _readCheckpointTimes(data_path, offsets)
+
+    index['timestamps'] = np.concatenate([index['timestamps'], timestamps])
+    index['offsets'] = np.concatenate([index['offsets'], offsets])
+    index['rows'] = np.concatenate([index['rows'], rows])
+    index['n_rows'] = np.int64(n_rows)
+    index['indexed_size'] = np.int64(indexed_size)
+
+    tmp_path = index_path + f'.{os.getpid()}.tmp.npz'
+    np.savez(tmp_path, **index)
+    os.replace(tmp_path, index_path)
+
+    return index
+
+
+def readTimeRange(data_path: str, start=None, end=None, every: int = 1000) -> pd.DataFrame:
+    """
+    Description: 读取时间戳位于[start, end)之间的行，通过时间索引直接定位而不扫描整个文件
+    -------------------------------
+    Parameters:
+    data_path: CSV记录文件路径，第一列为单调不减的时间戳
+    start: 起始时间，数值（单位：s）或时间字符串，为None时从文件开头读取
+    end: 结束时间（不包含），数值（单位：s）或时间字符串，为None时读到文件末尾
+    every: 时间索引的检查点间隔（行）
+
+    Returns:
+    df: 时间范围内的行组成的DataFrame，列名与文件表头一致
+    """
+    index = buildTimeIndex(data_path, every)
+    columns = [str(c) for c in index['columns']]
+    timestamps = index['timestamps']
+    if len(timestamps) == 0:
+        return pd.DataFrame(columns=columns)
+
+    start = -np.inf if start is None else toSeconds([start])[0]
+    end = np.inf if end is None else toSeconds([end])[0]
+
+    # 起点取时间戳严格小于start的最后一个检查点，终点取第一个时间戳不小于end的检查点
+    first = max(int(np.searchsorted(timestamps, start, side='left')) - 1, 0)
+    last = int(np.searchsorted(timestamps, end, side='left'))
+    stop_row = int(index['rows'][last]) if last < len(timestamps) else int(index['n_rows'])
+    n_rows = stop_row - int(index['rows'][first])
+    if n_rows <= 0:
+        return pd.DataFrame(columns=columns)
+
+    with open(data_path, 'rb') as f:
+        f.seek(int(index['offsets'][first]))
+        df = pd.read_csv(f, header=None, names=columns, nrows=n_rows)
+
+    seconds = toSeconds(df.iloc[:, 0].values)
+    return df[(seconds >= start) & (seconds < end)].reset_index(drop=True)
@@ -5,7 +5,7 @@ import platform
 import matplotlib as mpl
 import os
 
-from feature_extractor import spectral_analysis
+from feature_extractor import spectral_analysis, band_weights, EEG_BANDS
 
 
 def setup_matplotlib_fonts():
@@ -202,27 +202,17 @@ class EEGVisualizer:
         # 计算频谱
         freqs, psd = spectral_analysis(data, self.sample_rate)
         
-        # 定义频段
-        delta_mask = (freqs >= 0.5) & (freqs <= 4)
-        theta_mask = (freqs >= 4) & (freqs <= 8)
-        alpha_mask = (freqs >= 8) & (freqs <= 13)
-        beta_mask = (freqs >= 13) & (freqs <= 30)
-        gamma_mask = (freqs >= 30) & (freqs <= 100)
-        
-        band_names = ['Delta', 'Theta', 'Alpha', 'Beta', 'Gamma']
+        # 各频段能量由缓存的频段权重矩阵一次计算
+        band_names = [name.capitalize() for name in EEG_BANDS]
+        weights = band_weights(freqs)
+        band_powers = psd @ weights.T
+        band_density = band_powers / weights.sum(axis=1)  # 各频段内的平均功率谱密度
+        band_powers = band_powers / np.sum(band_powers, axis=1, keepdims=True)  # 归一化
         x = np.arange(len(band_names))
         width = 0.8 / data.shape[1]
-        
+
         for ch in range(data.shape[1]):
-            band_powers = [
-                np.sum(psd[ch, delta_mask]),
-                np.sum(psd[ch, theta_mask]),
-                np.sum(psd[ch, alpha_mask]),
-                np.sum(psd[ch, beta_mask]),
-                np.sum(psd[ch, gamma_mask])
-            ]
-            band_powers = np.array(band_powers) / np.sum(band_powers)  # 归一化
-            ax3.bar(x + ch * width, band_powers, width,
+            ax3.bar(x + ch * width, band_powers[ch], width,
                     label=channel_names[ch] if channel_names else f'Channel {ch + 1}',
                     color=colors[ch % len(colors)])
         
@@ -239,6 +229,7 @@ class EEGVisualizer:
         # 计算一些统计指标
         mean_power = np.mean(psd, axis=1)
         peak_freq = freqs[np.argmax(psd, axis=1)]
+        alpha, beta = list(EEG_BANDS).index('alpha'), list(EEG_BANDS).index('beta')
         
         info_text = (
             f"数据质量指标:\n"
@@ -248,7 +239,7 @@ class EEGVisualizer:
             f"统计信息:\n"
             f"平均功率: {mean_power.mean():.2f} uV^2\n"
             f"主频率: {peak_freq.mean():.1f} Hz\n"
-            f"Alpha/Beta比值: {np.sum(psd[:, alpha_mask].mean()) / np.sum(psd[:, beta_mask].mean()):.2f}"
+            f"Alpha/Beta比值: {band_density[:, alpha].mean() / band_density[:, beta].mean():.2f}"
         )
         ax4.text(0.1, 0.1, info_text, fontsize=12, verticalalignment='top',
                  bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.2))